@@ -0,0 +1,72 @@
+"""
+System Endpoints.
+Operational introspection for the API process (caches, internals, Prometheus metrics).
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import metrics
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.redis_client import get_async_redis
+from app.schemas.job import TaskType
+from app.services import memo
+from app.services.backlog import backlog_report
+from app.core.db_pool import pool_stats
+from app.core.status_cache import status_cache
+
+router = APIRouter()
+
+@router.get("/system/status-cache")
+async def get_status_cache_stats():
+    """
+    Hit-rate counters of this process's task status cache.
+    """
+    return status_cache.stats()
+
+@router.get("/system/db-pool")
+async def get_db_pool_stats():
+    """
+    Connection pool counters of this process (checkout wait time, in-use, overflow).
+    """
+    return pool_stats()
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus scrape endpoint (all API processes when PROMETHEUS_MULTIPROC_DIR is set).
+    """
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+def _celery_queues() -> list:
+    names = [celery_app.conf.task_default_queue]
+    for queue in celery_app.conf.task_queues or ():
+        if queue.name not in names:
+            names.append(queue.name)
+    return names
+
+@router.get("/system/backlog")
+async def get_backlog(
+    worker_slots: Optional[int] = Query(None, ge=1, description="Concurrent task slots; defaults to BACKLOG_WORKER_SLOTS"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Queue depth, in-flight jobs and estimated drain time, weighted by historical run
+    times per task type. Intended as an autoscaling signal (`pending_work_seconds`).
+    """
+    return await backlog_report(
+        db,
+        get_async_redis(),
+        _celery_queues(),
+        worker_slots or settings.BACKLOG_WORKER_SLOTS,
+    )
+
+@router.post("/system/memo/invalidate")
+async def invalidate_memo(task_type: TaskType):
+    """
+    Forget all memoized results (and in-flight claims) of a task type, e.g. after a
+    change to its processing logic. Subsequent submissions run again.
+    """
+    return {"task_type": task_type.value, "removed": await memo.invalidate(task_type.value)}
@@ -5,129 +5,608 @@ Follows the Async Task Queue pattern:
 1. Submit Task -> Return 202 Accepted + Task ID
 2. Poll/Stream Status -> Return JSON/SSE
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, tuple_
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from celery.result import AsyncResult
+from sqlalchemy.orm import load_only, selectinload
+from celery import states
 from app.worker import process_vector_data, celery_app
-from app.schemas.job import TaskCreate, TaskResponse, TaskStatusResponse, LogEntry
-from app.core.database import get_db
+from app.schemas.job import TaskCreate, TaskResponse, TaskBatchResponse, TaskStatusResponse, TaskSummary, TaskListResponse, LogEntry
+from app.core.config import settings
+from app.core import compression, serialization
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.events import event_hub, build_event, RESYNC, LOGS_WRITTEN
+from app.core.serialization import FastJSONResponse
+from app.core.status_cache import status_cache, make_etag, invalidate_task_status_async, TERMINAL_STATUSES
 from app.models.job import Job, JobLog, JobStatus
+from app.services import job_state, memo
+from app.services.blob_store import get_blob_store
+from app.services.vector_upload import ingest_vector_stream, UploadTooLargeError, UploadValidationError
 from fastapi.responses import StreamingResponse
+from typing import Optional
 import asyncio
+import base64
+import numpy as np
 import json
 import datetime
+import uuid
 
 router = APIRouter()
 
+def _validate_payload(payload: TaskCreate):
+    if payload.task_type == "web_scrape_batch":
+        if not payload.urls:
+            raise HTTPException(status_code=422, detail="urls is required for web_scrape_batch tasks")
+        if len(payload.urls) > settings.SCRAPE_BATCH_MAX_URLS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"web_scrape_batch accepts at most {settings.SCRAPE_BATCH_MAX_URLS} urls"
+            )
+
+def _prepare_payload(payload: TaskCreate):
+    """
+    Apply the claim-check pattern to large vector payloads.
+    Returns (input_payload for the Job row, blob reference or None). When a reference is
+    returned, neither the Job row nor the Celery message carries the vectors themselves.
+    """
+    input_payload = payload.dict()
+    vector_data = payload.vector_data
+    if not vector_data or len(vector_data) * 4 < settings.CLAIM_CHECK_THRESHOLD_BYTES:
+        return input_payload, None
+
+    array = np.asarray(vector_data, dtype=np.float32)
+    if payload.dimension and array.size % payload.dimension == 0:
+        array = array.reshape(-1, payload.dimension)
+    ref = get_blob_store().put_array(array).to_dict()
+    input_payload["vector_data"] = None
+    input_payload["vector_ref"] = ref
+    input_payload["blob_key"] = ref["key"]
+    return input_payload, ref
+
+def _dispatch_task(job_id: str, payload: TaskCreate, vector_ref: Optional[dict] = None, producer=None):
+    """
+    Publish the Celery message for a persisted job.
+    Passing a `producer` lets callers reuse one broker connection for many messages.
+    """
+    if payload.task_type == "web_scrape":
+        return celery_app.send_task(
+            "scrape_website",
+            args=[job_id, payload.url],
+            task_id=job_id,
+            producer=producer
+        )
+    if payload.task_type == "web_scrape_batch":
+        return celery_app.send_task(
+            "scrape_batch",
+            args=[job_id, payload.urls],
+            task_id=job_id,
+            producer=producer
+        )
+    # Default to Vector Processing
+    vector_data = None if vector_ref else payload.vector_data
+    return process_vector_data.apply_async(
+        args=[job_id, vector_data, payload.metadata, payload.duration, payload.dimension],
+        kwargs={"vector_ref": vector_ref} if vector_ref else None,
+        task_id=job_id,
+        producer=producer
+    )
+
+def _dispatch_batch(jobs: list, published: list):
+    """
+    Publish all messages of a batch over a single producer / broker connection.
+    Ids are appended to `published` as their messages go out, so after a failure the
+    caller knows which jobs were never queued.
+    """
+    with celery_app.producer_or_acquire() as producer:
+        for job_id, payload, vector_ref in jobs:
+            _dispatch_task(job_id, payload, vector_ref, producer=producer)
+            published.append(job_id)
+
+async def _memoized_job(db: AsyncSession, task_type: str, digest: str, job_id: str) -> Optional[TaskResponse]:
+    """
+    Claim `digest` for the new `job_id`. Returns the response for an identical job that
+    makes the new one unnecessary, or None if `job_id` should run.
+    """
+    while True:
+        existing_id = await memo.claim(task_type, digest, job_id)
+        if existing_id is None:
+            return None
+        existing = (await db.execute(
+            select(Job.status, Job.completed_at, Job.result_payload_json, Job.result_payload_packed)
+            .where(Job.id == existing_id)
+        )).first()
+        if existing is None:
+            age = await memo.claim_age(task_type, digest)
+            if age is not None and age < settings.MEMO_CLAIM_GRACE_SECONDS:
+                # Claimed by a submission that has not inserted its row yet
+                return TaskResponse(task_id=existing_id, status="Processing", memo="coalesced")
+            # No row long after the claim: that submission died before its INSERT
+            if await memo.replace(task_type, digest, existing_id, job_id):
+                return None
+            continue
+        status, completed_at, result_stub, result_packed = existing
+        if status in (JobStatus.PENDING.value, JobStatus.RUNNING.value):
+            return TaskResponse(task_id=existing_id, status="Processing", memo="coalesced")
+        if status == JobStatus.SUCCESS.value and completed_at is not None:
+            age = (datetime.datetime.utcnow() - completed_at).total_seconds()
+            if age <= memo.ttl_for(task_type):
+                result = compression.unpack(result_stub, result_packed)
+                return TaskResponse(task_id=existing_id, status="Completed", memo="hit", result=result)
+        # Failed, cancelled or outdated: take the entry over, unless someone else just did
+        if await memo.replace(task_type, digest, existing_id, job_id):
+            return None
+
 @router.post("/tasks", response_model=TaskResponse, status_code=202)
-async def create_task(payload: TaskCreate, db: AsyncSession = Depends(get_db)):
+async def create_task(payload: TaskCreate, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Submit a long-running task and persist it to the database.
+    Identical inputs are memoized per task type (see app.services.memo): a fresh result is
+    returned immediately (200, `memo: "hit"`), and a submission identical to a task still
+    in progress attaches to it (`memo: "coalesced"`) instead of queueing new work.
     """
+    _validate_payload(payload)
+
+    # Large vectors go to the blob store; file I/O stays off the event loop
+    input_payload, vector_ref = await asyncio.to_thread(_prepare_payload, payload)
+
+    job_id = str(uuid.uuid4())
+    task_type = payload.task_type.value
+    digest = None
+    if memo.ttl_for(task_type) > 0:
+        digest = memo.input_hash(payload, vector_ref)
+        memoized = await _memoized_job(db, task_type, digest, job_id)
+        if memoized is not None:
+            if memoized.memo == "hit":
+                response.status_code = 200
+            return memoized
+        input_payload["input_hash"] = digest
+
     # Create Job record
     new_job = Job(
-        input_payload=payload.dict(),
+        id=job_id,
+        input_payload=input_payload,
         status=JobStatus.PENDING.value
     )
     db.add(new_job)
-    await db.commit()
-    await db.refresh(new_job)
+    try:
+        await db.commit()
+    except Exception:
+        await memo.release_async(task_type, digest, job_id)
+        raise
 
     # Trigger Celery Task based on Type
-    if payload.task_type == "web_scrape":
-        task = celery_app.send_task(
-            "scrape_website",
-            args=[new_job.id, payload.url],
-            task_id=new_job.id
+    try:
+        _dispatch_task(job_id, payload, vector_ref)
+    except Exception:
+        # Never queued: fail the job so it does not sit in PENDING, and free the memo
+        # entry so identical submissions do not attach to it
+        await job_state.transition_async(db, job_id, job_state.FAILED)
+        await memo.release_async(task_type, digest, job_id)
+        await invalidate_task_status_async(job_id)
+        raise
+
+    return TaskResponse(task_id=job_id, status="Processing")
+
+@router.post("/tasks/batch", response_model=TaskBatchResponse, status_code=202)
+async def create_tasks_batch(payloads: list[TaskCreate], db: AsyncSession = Depends(get_db)):
+    """
+    Submit many tasks in one request.
+    All Job rows are written with one multi-row INSERT, then all Celery messages
+    are published over one broker connection.
+    Batch submissions bypass memoization: claiming every item in Redis would cost one
+    round trip per task, which is what this endpoint exists to avoid. Identical items
+    (within the batch or with earlier tasks) each run.
+    """
+    if not payloads:
+        raise HTTPException(status_code=422, detail="Batch must contain at least one task")
+    if len(payloads) > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the maximum of {settings.TASK_BATCH_MAX_SIZE} tasks"
         )
-    else:
-        # Default to Vector Processing
-        task = process_vector_data.apply_async(
-            args=[new_job.id, payload.vector_data, payload.metadata, payload.duration],
-            task_id=new_job.id
+
+    for payload in payloads:
+        _validate_payload(payload)
+
+    now = datetime.datetime.utcnow()
+    prepared = await asyncio.to_thread(lambda: [_prepare_payload(payload) for payload in payloads])
+    jobs = [
+        (str(uuid.uuid4()), payload, vector_ref)
+        for payload, (_, vector_ref) in zip(payloads, prepared)
+    ]
+    await db.execute(insert(Job), [
+        {
+            "id": job_id,
+            "input_payload": input_payload,
+            "status": JobStatus.PENDING.value,
+            "retry_count": 0,
+            "created_at": now,
+        }
+        for (job_id, _, _), (input_payload, _) in zip(jobs, prepared)
+    ])
+    await db.commit()
+
+    # Publishing is blocking I/O; keep it off the event loop.
+    published = []
+    try:
+        await asyncio.to_thread(_dispatch_batch, jobs, published)
+    except Exception as e:
+        # Fail what was never queued so it does not sit in PENDING; published jobs run
+        unpublished = [job_id for job_id, _, _ in jobs[len(published):]]
+        for job_id in unpublished:
+            await db.execute(job_state.transition_statement(job_id, job_state.FAILED))
+        await db.commit()
+        await invalidate_task_status_async(*unpublished)
+        print(f"Batch dispatch failed after {len(published)} of {len(jobs)} tasks: {e}")
+        # Queued ids are listed too: those tasks run, and the client has no other way to find them
+        raise HTTPException(status_code=503, detail={
+            "message": f"Task queue unavailable: {len(unpublished)} of {len(jobs)} tasks were not queued and are marked FAILED",
+            "queued_task_ids": published,
+            "failed_task_ids": unpublished,
+        })
+
+    return TaskBatchResponse(task_ids=[job_id for job_id, _, _ in jobs], status="Processing")
+
+@router.post(
+    "/tasks/vectors",
+    response_model=TaskResponse,
+    status_code=202,
+    openapi_extra={"requestBody": {"content": {
+        "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+        "application/x-npy": {"schema": {"type": "string", "format": "binary"}},
+    }, "required": True}},
+)
+async def create_vector_task_from_upload(
+    request: Request,
+    dimension: Optional[int] = Query(None, gt=0, description="Vector size (required for raw float32 bodies)"),
+    rows: Optional[int] = Query(None, gt=0, description="Expected number of vectors"),
+    metadata: str = Query("{}", description="JSON-encoded task metadata"),
+    duration: int = 10,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Submit a vector task with a binary body: raw little-endian float32 or a `.npy` file.
+    The body is streamed straight into the blob store (claim check) without being
+    buffered, and is validated by dtype and shape only.
+    """
+    try:
+        metadata_dict = json.loads(metadata)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="metadata must be a JSON object")
+    if not isinstance(metadata_dict, dict):
+        raise HTTPException(status_code=422, detail="metadata must be a JSON object")
+
+    try:
+        ref = await ingest_vector_stream(
+            request.stream(),
+            get_blob_store(),
+            dimension=dimension,
+            rows=rows,
+            max_bytes=settings.VECTOR_UPLOAD_MAX_BYTES,
         )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    return TaskResponse(task_id=new_job.id, status="Processing")
+    payload = TaskCreate(metadata=metadata_dict, duration=duration, dimension=ref.shape[1])
+    vector_ref = ref.to_dict()
+    input_payload = payload.dict()
+    input_payload["vector_ref"] = vector_ref
+    input_payload["blob_key"] = ref.key
 
-@router.get("/tasks", response_model=list[TaskStatusResponse])
-async def list_tasks(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db)):
+    job_id = str(uuid.uuid4())
+    db.add(Job(id=job_id, input_payload=input_payload, status=JobStatus.PENDING.value))
+    await db.commit()
+
+    try:
+        _dispatch_task(job_id, payload, vector_ref)
+    except Exception as e:
+        # Never queued: fail the job (retention then deletes its blob with it)
+        await job_state.transition_async(db, job_id, job_state.FAILED)
+        await invalidate_task_status_async(job_id)
+        print(f"Dispatch of vector upload {job_id} failed: {e}")
+        raise HTTPException(status_code=503, detail="Task queue unavailable; the task is marked FAILED")
+
+    return TaskResponse(task_id=job_id, status="Processing")
+
+def _encode_cursor(job: Job) -> str:
+    raw = json.dumps([job.created_at.isoformat(), job.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(created_at), str(job_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# `fields=` projection: response field -> Job columns it is built from
+FIELD_COLUMNS = {
+    "task_id": (Job.id,),
+    "status": (Job.status,),
+    "result_payload": (Job.result_payload_json, Job.result_payload_packed),
+    "created_at": (Job.created_at,),
+    "started_at": (Job.started_at,),
+    "completed_at": (Job.completed_at,),
+    "retry_count": (Job.retry_count,),
+}
+SUMMARY_FIELDS = tuple(FIELD_COLUMNS)
+DETAIL_FIELDS = SUMMARY_FIELDS + ("logs",)
+FIELDS_QUERY = Query(
+    None,
+    description="Comma-separated fields to return, e.g. `task_id,status,created_at`; columns "
+                "of other fields (such as `result_payload`) are not read from the database.",
+)
+
+def _parse_fields(fields: Optional[str], allowed: tuple) -> Optional[tuple]:
+    """Requested fields in response order, or None when `fields` was not given (all fields)."""
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid fields: {', '.join(sorted(unknown)) or '(none)'}; allowed: {', '.join(allowed)}",
+        )
+    return tuple(name for name in allowed if name in requested)
+
+def _load_only(projection: tuple, *always):
+    """Load the columns of `projection` (plus `always`); any other column raises if touched."""
+    columns = {column for name in projection if name in FIELD_COLUMNS for column in FIELD_COLUMNS[name]}
+    return load_only(*always, *columns, raiseload=True)
+
+def _project(job: Job, projection: tuple) -> dict:
+    """Response body with only the `projection` fields, serialized like TaskStatusResponse."""
+    attributes = ["id" if name == "task_id" else name for name in projection]
+    values = {name: getattr(job, name) for name in attributes if name != "logs"}
+    if "logs" in projection:
+        values["logs"] = [LogEntry.model_validate(log) for log in job.logs]
+    # model_construct: fields that were not requested are never read or validated
+    return TaskStatusResponse.model_construct(**values).model_dump(
+        mode="json", by_alias=True, include=set(attributes)
+    )
+
+@router.get("/tasks", response_model=TaskListResponse)
+async def list_tasks(
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    List all jobs with pagination.
+    List jobs, newest first, with keyset pagination on (created_at, id).
+    Each page is an index range scan, so latency does not grow with table size.
+    With `fields=`, items only carry those fields and only their columns are selected,
+    e.g. `fields=task_id,status,created_at,completed_at` for a table view.
     """
-    result = await db.execute(select(Job).offset(skip).limit(limit).order_by(Job.created_at.desc()))
+    projection = _parse_fields(fields, SUMMARY_FIELDS)
+    query = select(Job).order_by(Job.created_at.desc(), Job.id.desc()).limit(limit + 1)
+    if projection is not None:
+        # id and created_at make the cursor
+        query = query.options(_load_only(projection, Job.id, Job.created_at))
+    if cursor:
+        created_at, job_id = _decode_cursor(cursor)
+        query = query.where(tuple_(Job.created_at, Job.id) < tuple_(created_at, job_id))
+
+    result = await db.execute(query)
     jobs = result.scalars().all()
-    return jobs
 
-@router.get("/tasks/{task_id}", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str, db: AsyncSession = Depends(get_db)):
+    next_cursor = None
+    if len(jobs) > limit:
+        jobs = jobs[:limit]
+        next_cursor = _encode_cursor(jobs[-1])
+
+    if projection is None:
+        return TaskListResponse(items=jobs, next_cursor=next_cursor)
+    return FastJSONResponse({"items": [_project(job, projection) for job in jobs], "next_cursor": next_cursor})
+
+@router.get("/tasks/{task_id}", response_model=TaskStatusResponse, responses={304: {"description": "Not Modified"}})
+async def get_task_status(
+    task_id: str,
+    request: Request,
+    include_logs: bool = True,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get the status and details of a specific job from the database.
+    Get the status and details of a specific job.
+    Served from the two-tier status cache when possible. The response carries an
+    `ETag`; polling with `If-None-Match` returns 304 while the job is unchanged.
+    With `include_logs=false` the `logs` field is omitted and logs are not loaded;
+    use `/tasks/{task_id}/logs?after_id=` to tail them instead.
+    With `fields=` only those fields are returned (and read); it replaces `include_logs`,
+    logs are included when `logs` is one of the fields. E.g. `fields=status` for polling.
     """
-    result = await db.execute(select(Job).options(selectinload(Job.logs)).where(Job.id == task_id))
-    job = result.scalars().first()
+    projection = _parse_fields(fields, DETAIL_FIELDS)
+    if projection is None:
+        variant = "" if include_logs else "nologs"
+    else:
+        include_logs = "logs" in projection
+        variant = "fields=" + ",".join(projection)
+    if_none_match = request.headers.get("if-none-match")
+    entry, version, version_known = await status_cache.lookup(task_id, variant)
+
+    if entry is None:
+        if version_known and if_none_match == make_etag(task_id, version, variant):
+            status_cache.record_not_modified()
+            return Response(status_code=304, headers={"ETag": if_none_match})
+
+        query = select(Job).where(Job.id == task_id)
+        if projection is not None:
+            # status decides how long the body is cached
+            query = query.options(_load_only(projection, Job.status))
+        if include_logs:
+            query = query.options(selectinload(Job.logs))
+        result = await db.execute(query)
+        job = result.scalars().first()
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        if projection is None:
+            schema = TaskStatusResponse if include_logs else TaskSummary
+            body = schema.model_validate(job).model_dump(mode="json", by_alias=True)
+        else:
+            body = _project(job, projection)
+        entry = await status_cache.store(task_id, version, body, job.status, variant)
 
-    if not job:
-        raise HTTPException(status_code=404, detail="Task not found")
+    if if_none_match == entry.etag:
+        status_cache.record_not_modified()
+        return Response(status_code=304, headers={"ETag": entry.etag})
 
-    return job
+    return FastJSONResponse(entry.body, headers={"ETag": entry.etag})
 
 @router.get("/tasks/{task_id}/logs", response_model=list[LogEntry])
-async def get_task_logs(task_id: str, db: AsyncSession = Depends(get_db)):
+async def get_task_logs(
+    task_id: str,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Retrieve logs for a specific job.
+    Retrieve logs for a specific job, oldest first.
+    Pass the `id` of the last entry seen as `after_id` to fetch only newer lines.
     """
-    result = await db.execute(select(JobLog).where(JobLog.job_id == task_id).order_by(JobLog.timestamp))
+    result = await db.execute(
+        select(JobLog)
+        .where(JobLog.job_id == task_id, JobLog.id > after_id)
+        .order_by(JobLog.id)
+        .limit(limit)
+    )
     logs = result.scalars().all()
     return logs
 
+async def _fetch_logs_after(task_id: str, after_id: int, limit: int):
+    """Return (job status or None, new log rows) using a short-lived session."""
+    async with AsyncSessionLocal() as session:
+        status = await session.scalar(select(Job.status).where(Job.id == task_id))
+        result = await session.execute(
+            select(JobLog)
+            .where(JobLog.job_id == task_id, JobLog.id > after_id)
+            .order_by(JobLog.id)
+            .limit(limit)
+        )
+        return status, result.scalars().all()
+
+@router.get("/tasks/{task_id}/logs/stream")
+async def stream_task_logs(task_id: str, request: Request, after_id: int = Query(0, ge=0)):
+    """
+    Stream new log lines using Server-Sent Events (SSE).
+    Each line is sent with its log id as the SSE `id`, so a reconnecting client resumes
+    from `Last-Event-ID`. The worker notifies the event hub after each log flush; only
+    the new rows are read. An `end` event is sent once the job is finished.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after_id = max(after_id, int(last_event_id))
+    batch_size = settings.LOG_STREAM_BATCH_SIZE
+
+    async def event_generator():
+        queue = event_hub.subscribe(task_id)
+        cursor = after_id
+        try:
+            while True:
+                status, rows = await _fetch_logs_after(task_id, cursor, batch_size)
+                if status is None:
+                    yield f"event: error\ndata: {serialization.dumps({'detail': 'Task not found'})}\n\n"
+                    break
+
+                for row in rows:
+                    entry = LogEntry.model_validate(row).model_dump(mode="json")
+                    yield f"id: {row.id}\ndata: {serialization.dumps(entry)}\n\n"
+                    cursor = row.id
+
+                if len(rows) == batch_size:
+                    continue  # More history to catch up on
+                if status in TERMINAL_STATUSES:
+                    yield f"event: end\ndata: {serialization.dumps({'task_id': task_id, 'status': status})}\n\n"
+                    break
+
+                # Sleep until new logs are written or the job finishes
+                while True:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if event is RESYNC or event["status"] == LOGS_WRITTEN or event["status"] in states.READY_STATES:
+                        break
+                # Coalesce notifications that piled up while we were waiting
+                while not queue.empty():
+                    queue.get_nowait()
+        finally:
+            event_hub.unsubscribe(task_id, queue)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
 @router.delete("/tasks/{task_id}", status_code=204)
 async def cancel_task(task_id: str, db: AsyncSession = Depends(get_db)):
     """
     Cancel a running task.
+    The status change is one conditional UPDATE, so it cannot be overwritten by a worker
+    finishing concurrently; cancelling an already cancelled task is a no-op.
     """
-    result = await db.execute(select(Job).where(Job.id == task_id))
-    job = result.scalars().first()
-
-    if not job:
-        raise HTTPException(status_code=404, detail="Task not found")
+    row = await job_state.transition_async(db, task_id, job_state.CANCELLED)
+    if row is None:
+        if await job_state.current_status_async(db, task_id) is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return
 
     # Revoke Celery task
     celery_app.control.revoke(task_id, terminate=True)
 
-    # Update DB status
-    job.status = JobStatus.CANCELLED.value
-    job.completed_at = datetime.datetime.utcnow()
-    await db.commit()
+    # Identical submissions must not attach to (or reuse) a cancelled job
+    await memo.release_async(row.task_type, row.input_hash, task_id)
+
+    await invalidate_task_status_async(task_id)
+
+    # Let SSE watchers close their streams
+    await event_hub.publish(task_id, states.REVOKED)
 
     return
 
+def _task_snapshot(task_id: str) -> dict:
+    """Read the current task state from the Celery result backend."""
+    task_result = celery_app.AsyncResult(task_id)
+    data = build_event(task_id, task_result.status)
+    if task_result.status == 'PROGRESS' or task_result.ready():
+        data["result"] = task_result.result
+    return data
+
 @router.get("/tasks/{task_id}/stream")
-async def stream_task_status(task_id: str, db: AsyncSession = Depends(get_db)):
+async def stream_task_status(task_id: str):
     """
     Stream task status updates using Server-Sent Events (SSE).
+    The current state is read once from the result backend; subsequent updates are
+    pushed by the worker through the shared event hub (no per-client polling).
     """
     async def event_generator():
-        while True:
-            task_result = celery_app.AsyncResult(task_id)
-            
-            data = {
-                "task_id": task_id,
-                "status": task_result.status,
-                "result": None
-            }
-
-            if task_result.status == 'PROGRESS':
-                data["result"] = task_result.result
-            elif task_result.ready():
-                data["result"] = task_result.result
-            
-            yield f"data: {json.dumps(data)}\n\n"
-
-            if task_result.ready():
-                break
-            
-            await asyncio.sleep(1)
+        queue = event_hub.subscribe(task_id)
+        try:
+            # Subscribe first, then snapshot, so no event can fall between the two.
+            data = await asyncio.to_thread(_task_snapshot, task_id)
+            while True:
+                yield f"data: {serialization.dumps(data)}\n\n"
+                if data["status"] in states.READY_STATES:
+                    break
+
+                while True:
+                    try:
+                        data = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        # SSE comment line keeps proxies from closing an idle stream
+                        yield ": keep-alive\n\n"
+                        continue
+                    if data is RESYNC:
+                        data = await asyncio.to_thread(_task_snapshot, task_id)
+                    # Log notifications are for the log stream only
+                    if data["status"] != LOGS_WRITTEN:
+                        break
+        finally:
+            event_hub.unsubscribe(task_id, queue)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
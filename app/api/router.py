@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from app.api.endpoints import tasks
+from app.api.endpoints import tasks, system
 
 api_router = APIRouter()
 api_router.include_router(tasks.router, tags=["tasks"])
+api_router.include_router(system.router, tags=["system"])
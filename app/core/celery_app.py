@@ -1,5 +1,7 @@
 from celery import Celery
+from kombu import Queue
 from app.core.config import settings
+from app.core.serialization import register_celery_codecs
 from app.core.telemetry import init_tracer, instrument_celery
 import os
 
@@ -17,9 +19,9 @@ celery_app = Celery(
 )
 
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=settings.CELERY_SERIALIZER,
+    accept_content=register_celery_codecs(settings.CELERY_SERIALIZER),
+    result_serializer=settings.CELERY_SERIALIZER,
     timezone="UTC",
     enable_utc=True,
     # Reliability Settings:
@@ -27,3 +29,45 @@ celery_app.conf.update(
     task_reject_on_worker_lost=True, # Re-queue task if worker process is killed abruptly (OOM).
     broker_transport_options={"visibility_timeout": 3600}, # 1 hour visibility timeout. If worker doesn't ACK in 1h, task is re-queued.
 )
+
+# --- Queues per task type ---
+# Network-bound scrapes and CPU-bound vector work get separate queues (and separate
+# workers), so a burst of one type cannot block the other behind it.
+TASK_QUEUES = {
+    "scrape_website": settings.SCRAPE_QUEUE,
+    "scrape_batch": settings.SCRAPE_QUEUE,
+    "process_vector_data": settings.VECTOR_QUEUE,
+}
+
+celery_app.conf.update(
+    task_default_queue="celery",
+    task_queues=[Queue("celery"), Queue(settings.SCRAPE_QUEUE), Queue(settings.VECTOR_QUEUE)],
+    task_routes={name: {"queue": queue} for name, queue in TASK_QUEUES.items()},
+)
+
+# --- Worker profiles ---
+# Selected with WORKER_PROFILE; start the worker with the matching `-Q` (see docker-compose.yml).
+#   scrape: many threads (tasks wait on the network, not the CPU); a few messages prefetched per thread.
+#   vector: one process per core; prefetch 1 so a long job never holds queued messages
+#           that an idle process could run.
+# Acks are the same for every profile (late, set above): nothing requeues a job whose
+# task was lost after an early ack, so it would stay RUNNING for good, however cheap a
+# repeated scrape is. Redeliveries are absorbed by the workers' idempotency check.
+# task_reject_on_worker_lost only has an effect in the prefork (vector) pool.
+WORKER_PROFILES = {
+    "default": {},
+    "scrape": {
+        "worker_pool": "threads",
+        "worker_concurrency": settings.SCRAPE_WORKER_CONCURRENCY,
+        "worker_prefetch_multiplier": 4,
+    },
+    "vector": {
+        "worker_pool": "prefork",
+        "worker_concurrency": settings.VECTOR_WORKER_CONCURRENCY or os.cpu_count(),
+        "worker_prefetch_multiplier": 1,
+    },
+}
+
+if settings.WORKER_PROFILE not in WORKER_PROFILES:
+    raise ValueError(f"Unknown WORKER_PROFILE: {settings.WORKER_PROFILE}")
+celery_app.conf.update(WORKER_PROFILES[settings.WORKER_PROFILE])
@@ -0,0 +1,183 @@
+"""
+Payload Compression.
+Large job payloads are stored zstd-compressed in a binary column next to their JSON column.
+
+    jobs.input_payload          JSON    the payload, or only its top-level scalar fields ("stub")
+    jobs.input_payload_packed   BYTEA   NULL, or codec marker byte + compressed payload
+
+Payloads whose JSON encoding reaches PAYLOAD_COMPRESSION_THRESHOLD_BYTES are packed; smaller
+ones (and every row written before compression existed) keep the plain JSON column only.
+The stub keeps short scalar fields such as `task_type`, `duration` or `input_hash` in the
+JSON column, so JSON path queries (app.services.job_state) work on packed rows as well.
+
+Codec markers:
+    0x01  zstd frame
+    0x02  zstd frame compressed with a trained dictionary: PAYLOAD_ZSTD_DICT_PATH for new
+          payloads, any `*.dict` file in its directory (matched by dictionary id) for reads
+
+`Job.input_payload` / `Job.result_payload` are `packed_json` hybrids: assignments,
+ORM UPDATEs and bulk INSERTs pack transparently; reading the attribute decompresses, and
+only then. Core selects of the hybrid return the stub: select the `*_packed` column too
+and call `unpack`.
+"""
+import functools
+import os
+from typing import Any, Optional, Tuple
+
+from sqlalchemy.ext.hybrid import hybrid_property
+
+from app.core import serialization
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed when PAYLOAD_COMPRESSION = "zstd"
+    zstandard = None
+
+CODEC_ZSTD = 0x01
+CODEC_ZSTD_DICT = 0x02
+
+# Stub fields: scalars only, and strings no longer than this
+STUB_MAX_STRING = 256
+
+
+class PayloadCodecError(ValueError):
+    """A packed payload cannot be decoded (unknown codec, missing dictionary)."""
+
+
+@functools.lru_cache(maxsize=1)
+def _dictionary() -> Optional["zstandard.ZstdCompressionDict"]:
+    """The dictionary new payloads are compressed with (PAYLOAD_ZSTD_DICT_PATH)."""
+    if not settings.PAYLOAD_ZSTD_DICT_PATH:
+        return None
+    dictionary = _load_dictionary(settings.PAYLOAD_ZSTD_DICT_PATH)
+    # Precomputed once per process; compressors created from it are cheap
+    dictionary.precompute_compress(level=settings.PAYLOAD_COMPRESSION_LEVEL)
+    return dictionary
+
+
+@functools.lru_cache(maxsize=None)
+def _dictionary_by_id(dict_id: int) -> Optional["zstandard.ZstdCompressionDict"]:
+    """
+    Dictionaries for decompression: every `*.dict` file next to PAYLOAD_ZSTD_DICT_PATH, so
+    rows packed with an earlier dictionary stay readable after training a new one.
+    """
+    if not settings.PAYLOAD_ZSTD_DICT_PATH:
+        return None
+    directory = os.path.dirname(settings.PAYLOAD_ZSTD_DICT_PATH) or "."
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".dict"):
+            dictionary = _load_dictionary(os.path.join(directory, name))
+            if dictionary.dict_id() == dict_id:
+                return dictionary
+    return None
+
+
+def _load_dictionary(path: str) -> "zstandard.ZstdCompressionDict":
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def _enabled() -> bool:
+    if settings.PAYLOAD_COMPRESSION == "none":
+        return False
+    if settings.PAYLOAD_COMPRESSION != "zstd":
+        raise ValueError(f"Unknown PAYLOAD_COMPRESSION: {settings.PAYLOAD_COMPRESSION}")
+    if zstandard is None:
+        raise RuntimeError("PAYLOAD_COMPRESSION is zstd but zstandard is not installed (pip install zstandard)")
+    return True
+
+
+def _stub(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return None
+    return {
+        key: item for key, item in value.items()
+        if item is None or isinstance(item, (bool, int, float))
+        or (isinstance(item, str) and len(item) <= STUB_MAX_STRING)
+    }
+
+
+def compress(raw: bytes) -> bytes:
+    """Marker byte + zstd frame (with the trained dictionary, if one is configured)."""
+    dictionary = _dictionary()
+    # Compressor objects are not thread-safe: one per call (scrape workers run threads)
+    if dictionary is not None:
+        compressor = zstandard.ZstdCompressor(level=settings.PAYLOAD_COMPRESSION_LEVEL, dict_data=dictionary)
+        return bytes((CODEC_ZSTD_DICT,)) + compressor.compress(raw)
+    compressor = zstandard.ZstdCompressor(level=settings.PAYLOAD_COMPRESSION_LEVEL)
+    return bytes((CODEC_ZSTD,)) + compressor.compress(raw)
+
+
+def decompress(packed: bytes) -> bytes:
+    packed = bytes(packed)
+    codec, frame = packed[0], packed[1:]
+    if zstandard is None:
+        raise PayloadCodecError("Packed payload found but zstandard is not installed")
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(frame)
+    if codec == CODEC_ZSTD_DICT:
+        dict_id = zstandard.get_frame_parameters(frame).dict_id
+        dictionary = _dictionary_by_id(dict_id)
+        if dictionary is None:
+            raise PayloadCodecError(f"Payload dictionary {dict_id} not found next to PAYLOAD_ZSTD_DICT_PATH")
+        return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(frame)
+    raise PayloadCodecError(f"Unknown payload codec marker: {codec:#04x}")
+
+
+def pack(value: Any) -> Tuple[Any, Optional[bytes]]:
+    """(JSON column value, packed column value) for a payload."""
+    if value is None or not _enabled():
+        return value, None
+    raw = serialization.dumps_bytes(value)
+    if len(raw) < settings.PAYLOAD_COMPRESSION_THRESHOLD_BYTES:
+        return value, None
+    return _stub(value), compress(raw)
+
+
+def unpack(stub: Any, packed: Optional[bytes]) -> Any:
+    """The payload stored as (`stub`, `packed`); rows without a packed value are plain JSON."""
+    if packed is None:
+        return stub
+    return serialization.loads(decompress(packed))
+
+
+def train_dictionary(samples, size: int = 112 * 1024) -> bytes:
+    """Train a zstd dictionary from sample payloads (JSON-serializable values)."""
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed (pip install zstandard)")
+    return zstandard.train_dictionary(size, [serialization.dumps_bytes(sample) for sample in samples]).as_bytes()
+
+
+def packed_json(name: str, json_attr: str, packed_attr: str) -> hybrid_property:
+    """
+    Hybrid attribute `name` over the JSON column attribute `json_attr` and the packed
+    column attribute `packed_attr`. At class level it is the JSON column (stub), so JSON
+    path expressions keep working.
+    """
+    def fget(self):
+        return unpack(getattr(self, json_attr), getattr(self, packed_attr))
+
+    def fset(self, value):
+        stub, packed = pack(value)
+        setattr(self, json_attr, stub)
+        setattr(self, packed_attr, packed)
+
+    def expr(cls):
+        # The column, not the ORM attribute: UPDATE ... values({hybrid: v}) then goes
+        # through update_expr instead of writing the JSON column directly
+        return getattr(cls, json_attr).expression
+
+    def update_expr(cls, value):
+        stub, packed = pack(value)
+        return [(getattr(cls, json_attr), stub), (getattr(cls, packed_attr), packed)]
+
+    def bulk_dml_setter(cls, mapping, value):
+        stub, packed = pack(value)
+        del mapping[name]
+        mapping[json_attr] = stub
+        mapping[packed_attr] = packed
+
+    fget.__name__ = fset.__name__ = name
+    # Keyword construction: hybrid_property.bulk_dml() cannot copy itself in SQLAlchemy 2.1
+    return hybrid_property(fget, fset, expr=expr, update_expr=update_expr, bulk_dml_setter=bulk_dml_setter)
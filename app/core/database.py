@@ -1,24 +1,98 @@
+import uuid
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.db_pool import instrumented_pool_class
+
+def _engine_options(url: str, name: str, pool_class, pool_size: int, max_overflow: int) -> dict:
+    """Pool sizing and instrumentation; SQLite keeps SQLAlchemy's default pool."""
+    if url.startswith("sqlite"):
+        return {}
+    options = {
+        "poolclass": instrumented_pool_class(pool_class, name),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE and "+asyncpg" in url:
+        # Transaction pooling hands each transaction to any server connection, so
+        # asyncpg's named prepared statements must be unique and never cached.
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
 
 # Async for FastAPI
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    **_engine_options(settings.DATABASE_URL, "async", AsyncAdaptedQueuePool, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+)
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
 # Sync for Celery
-sync_engine = create_engine(settings.SYNC_DATABASE_URL, echo=False)
+sync_engine = create_engine(
+    settings.SYNC_DATABASE_URL,
+    echo=False,
+    **_engine_options(settings.SYNC_DATABASE_URL, "sync", QueuePool, settings.SYNC_DB_POOL_SIZE, settings.SYNC_DB_MAX_OVERFLOW),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
+def reset_sync_engine():
+    """
+    Give a forked process its own connections. Connections inherited from the parent
+    share sockets with it; `close=False` drops them without sending anything on those
+    sockets, and the next checkout opens fresh connections in this process.
+    """
+    sync_engine.dispose(close=False)
+
 Base = declarative_base()
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+def _add_missing_columns(conn):
+    # Likewise for columns declared later: add them to existing tables (nullable
+    # columns only, so existing rows stay valid).
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                print(f"Cannot add NOT NULL column {table.name}.{column.name} to an existing table")
+                continue
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(conn.dialect)}"
+            )
+
+def _create_missing_indexes(conn):
+    # create_all only creates indexes together with new tables; add indexes
+    # declared later to tables that already exist.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
 async def init_db():
+    from app.core.partitions import create_partitioned_tables
+
     async with engine.begin() as conn:
+        # Partitioned tables (PostgreSQL) first; create_all skips existing tables
+        await conn.run_sync(create_partitioned_tables)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
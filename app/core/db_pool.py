@@ -0,0 +1,99 @@
+"""
+Database Pool Instrumentation.
+Counters for the SQLAlchemy connection pools of this process, used to size
+`DB_POOL_SIZE`/`DB_MAX_OVERFLOW` against the server's `max_connections`.
+
+Per engine: checkouts, time spent waiting for a connection (total / max), checkouts
+that had to open an overflow connection, checkout timeouts, plus the live pool gauges
+(size, checked out, overflow).
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+
+class PoolStats:
+    """Thread-safe counters for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+        # Called with (waited, overflowed, timed_out) per checkout, e.g. by app.core.metrics
+        self.listeners: List[Callable[[float, bool, bool], None]] = []
+
+    def record(self, waited: float, overflowed: bool, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if overflowed:
+                self.overflow_events += 1
+        for listener in self.listeners:
+            listener(waited, overflowed, timed_out)
+
+    def snapshot(self) -> Dict[str, object]:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+            }
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update({
+                "pool_class": type(pool).__bases__[0].__name__,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "idle": pool.checkedin(),
+            })
+        return data
+
+
+# Engine name -> stats, for every instrumented engine in this process
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+def instrumented_pool_class(base: Type[Pool], name: str) -> Type[Pool]:
+    """
+    Subclass of `base` (e.g. QueuePool) that times every checkout into `POOL_STATS[name]`.
+    The stats live on the class, so they survive `engine.dispose()` (which recreates the pool).
+    """
+    stats = POOL_STATS.setdefault(name, PoolStats(name))
+
+    def __init__(self, *args, **kwargs):
+        base.__init__(self, *args, **kwargs)
+        stats.pool = self
+
+    def _do_get(self):
+        started = time.perf_counter()
+        overflow_before = self.overflow() if hasattr(self, "overflow") else 0
+        try:
+            entry = base._do_get(self)
+        except exc.TimeoutError:
+            stats.record(time.perf_counter() - started, False, timed_out=True)
+            raise
+        overflow_after = self.overflow() if hasattr(self, "overflow") else 0
+        stats.record(time.perf_counter() - started, overflow_after > max(0, overflow_before))
+        return entry
+
+    return type(f"Instrumented{base.__name__}", (base,), {"__init__": __init__, "_do_get": _do_get, "stats": stats})
+
+
+def pool_stats() -> Dict[str, Dict[str, object]]:
+    return {name: stats.snapshot() for name, stats in POOL_STATS.items()}
@@ -0,0 +1,164 @@
+"""
+Task Event Bus.
+Pushes task progress from the worker to the API over Redis Pub/Sub.
+
+Worker side: `publish_task_event` is called from `update_state` and the `DatabaseTask` hooks.
+API side: one `TaskEventHub` per process holds a single subscription and fans events
+out to every SSE client watching a task, so Redis load follows the number of events
+rather than the number of open connections.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core import serialization
+from app.core.config import settings
+from app.core.metrics import SSE_CONNECTIONS
+from app.core.redis_client import get_async_redis, get_sync_redis
+
+# Sentinel pushed to subscribers after the hub reconnects, so they re-read the snapshot.
+RESYNC = {"status": "__RESYNC__"}
+
+# Pseudo-status published by the worker after new log rows for a job are committed.
+LOGS_WRITTEN = "LOGS"
+
+
+def build_event(task_id: str, status: str, result: Any = None) -> Dict[str, Any]:
+    """Shape shared by published events and SSE frames."""
+    return {"task_id": task_id, "status": status, "result": result}
+
+
+def publish_task_event(task_id: str, status: str, result: Any = None):
+    """
+    Publish a task event from the worker (sync).
+    Failures are swallowed: the result backend remains the source of truth.
+    """
+    try:
+        get_sync_redis().publish(settings.TASK_EVENTS_CHANNEL, serialization.dumps_bytes(build_event(task_id, status, result)))
+    except redis.RedisError as e:
+        print(f"Task event publish failed: {e}")
+
+
+class TaskEventHub:
+    """
+    Per-process fan-out hub.
+    Runs one Redis subscriber and dispatches each event to the queues of the local
+    clients watching that task.
+    """
+
+    def __init__(self, url: str, channel: str, queue_size: int = 100):
+        self.url = url
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._callbacks: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def start(self):
+        """Start the shared subscriber (idempotent). Also started lazily by `subscribe`."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    def add_callback(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """Register a sync callback invoked with (task_id, event) for every event."""
+        self._callbacks.append(callback)
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        self.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[task_id].add(queue)
+        SSE_CONNECTIONS.inc()
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(task_id)
+        if queues is None:
+            return
+        if queue in queues:
+            queues.discard(queue)
+            SSE_CONNECTIONS.dec()
+        if not queues:
+            del self._subscribers[task_id]
+
+    async def publish(self, task_id: str, status: str, result: Any = None):
+        """Publish an event from the API process (e.g. on cancellation)."""
+        try:
+            await get_async_redis().publish(self.channel, serialization.dumps_bytes(build_event(task_id, status, result)))
+        except redis.RedisError as e:
+            print(f"Task event publish failed: {e}")
+
+    def _dispatch(self, task_id: str, event: Dict[str, Any]):
+        for callback in self._callbacks:
+            try:
+                callback(task_id, event)
+            except Exception as e:
+                print(f"Task event callback error: {e}")
+        for queue in list(self._subscribers.get(task_id, ())):
+            self._offer(queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        # A slow client only needs the latest progress: drop the oldest event instead of blocking the hub.
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    async def _listen(self):
+        backoff = 0.5
+        reconnected = False
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 0.5
+                if reconnected:
+                    # Events may have been missed while disconnected.
+                    for queues in list(self._subscribers.values()):
+                        for queue in list(queues):
+                            self._offer(queue, RESYNC)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        event = serialization.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    task_id = event.get("task_id")
+                    if task_id:
+                        self._dispatch(task_id, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Task event subscriber error: {e}. Reconnecting in {backoff}s")
+                reconnected = True
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10)
+            finally:
+                try:
+                    await pubsub.close()
+                    await client.close()
+                except Exception:
+                    pass
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+event_hub = TaskEventHub(settings.REDIS_URL, settings.TASK_EVENTS_CHANNEL)
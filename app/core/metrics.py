@@ -0,0 +1,211 @@
+"""
+Prometheus Metrics.
+Collectors shared by the API (`GET /metrics`) and the worker exporter (`WORKER_METRICS_PORT`).
+
+All collectors and their label children are created at import time over small, fixed
+label sets (endpoint name, task type, engine name), so recording a sample is a dict
+lookup plus an increment; request paths, task ids and URLs are never used as labels.
+
+Multi-process servers (uvicorn --workers, Celery prefork) set `PROMETHEUS_MULTIPROC_DIR`
+before start-up: every process then writes its samples to memory-mapped files in that
+directory and the exporter aggregates them on scrape.
+"""
+import os
+import time
+from typing import Optional, Set
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from sqlalchemy import event
+
+from app.core.db_pool import POOL_STATS
+from app.schemas.job import TaskType
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS:
+    # prometheus_client opens its mmap files there as soon as the collectors below exist
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+# Route (endpoint function) name -> metric label. Other routes are not timed.
+TIMED_ROUTES = {
+    "create_task": "submit",
+    "create_tasks_batch": "submit_batch",
+    "create_vector_task_from_upload": "submit_vectors",
+    "get_task_status": "status",
+    "list_tasks": "list",
+}
+
+# Celery task name -> TaskType value
+TASK_TYPES = {
+    "process_vector_data": TaskType.VECTOR.value,
+    "scrape_website": TaskType.SCRAPE.value,
+    "scrape_batch": TaskType.SCRAPE_BATCH.value,
+}
+
+ENGINES = ("async", "sync")
+
+BREAKER_STATES = {"closed": 0, "half-open": 1, "open": 2}
+
+# --- API ---
+API_REQUEST_SECONDS = Histogram(
+    "api_request_duration_seconds", "API request latency by endpoint", ["endpoint"], buckets=LATENCY_BUCKETS,
+)
+_ROUTE_HISTOGRAMS = {route: API_REQUEST_SECONDS.labels(label) for route, label in TIMED_ROUTES.items()}
+
+SSE_CONNECTIONS = Gauge(
+    "sse_active_connections", "Open SSE streams (status and log streams)", multiprocess_mode="livesum",
+)
+
+# --- Tasks ---
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "task_queue_wait_seconds", "Time from job creation to RUNNING (first attempt)", ["task_type"], buckets=TASK_BUCKETS,
+)
+TASK_RUN_SECONDS = Histogram(
+    "task_run_duration_seconds", "Task execution time by outcome", ["task_type", "outcome"], buckets=TASK_BUCKETS,
+)
+TASK_RETRIES = Counter("task_retries_total", "Task retries scheduled", ["task_type"])
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state", "External service breaker (0 closed, 1 half-open, 2 open; max over processes)",
+    ["breaker"], multiprocess_mode="livemax",
+)
+
+_QUEUE_WAIT = {task: TASK_QUEUE_WAIT_SECONDS.labels(t) for task, t in TASK_TYPES.items()}
+_RETRIES = {task: TASK_RETRIES.labels(t) for task, t in TASK_TYPES.items()}
+_RUN = {
+    (task, outcome): TASK_RUN_SECONDS.labels(t, outcome)
+    for task, t in TASK_TYPES.items()
+    for outcome in ("SUCCESS", "FAILURE", "RETRY")
+}
+
+# --- Database pools ---
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", ["engine"], buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_OVERFLOW = Counter("db_pool_overflow_total", "Checkouts that opened an overflow connection", ["engine"])
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that timed out", ["engine"])
+DB_POOL_IN_USE = Gauge("db_pool_connections_in_use", "Checked-out connections", ["engine"], multiprocess_mode="livesum")
+
+_POOL_WAIT = {name: DB_POOL_WAIT_SECONDS.labels(name) for name in ENGINES}
+_POOL_OVERFLOW = {name: DB_POOL_OVERFLOW.labels(name) for name in ENGINES}
+_POOL_TIMEOUTS = {name: DB_POOL_TIMEOUTS.labels(name) for name in ENGINES}
+_POOL_IN_USE = {name: DB_POOL_IN_USE.labels(name) for name in ENGINES}
+_INSTRUMENTED_ENGINES: Set[str] = set()
+
+
+class LatencyMiddleware:
+    """
+    Pure ASGI middleware timing the routes in `TIMED_ROUTES`. The route is resolved by the
+    router during the call (`scope["route"]`), so unmatched paths cost nothing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            histogram = _ROUTE_HISTOGRAMS.get(getattr(route, "name", None))
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - started)
+
+
+def observe_queue_wait(task_name: str, seconds: float):
+    histogram = _QUEUE_WAIT.get(task_name)
+    if histogram is not None:
+        histogram.observe(max(0.0, seconds))
+
+
+def observe_task_run(task_name: str, outcome: str, seconds: float):
+    histogram = _RUN.get((task_name, outcome))
+    if histogram is not None:
+        histogram.observe(seconds)
+
+
+def count_retry(task_name: str):
+    counter = _RETRIES.get(task_name)
+    if counter is not None:
+        counter.inc()
+
+
+def set_breaker_state(name: str, state: str):
+    CIRCUIT_BREAKER_STATE.labels(name).set(BREAKER_STATES.get(state, 0))
+
+
+def _record_pool_checkout(name: str, waited: float, overflowed: bool, timed_out: bool):
+    if name not in _POOL_WAIT:
+        return
+    _POOL_WAIT[name].observe(waited)
+    if overflowed:
+        _POOL_OVERFLOW[name].inc()
+    if timed_out:
+        _POOL_TIMEOUTS[name].inc()
+
+
+def instrument_engine(engine, name: str):
+    """
+    Feed an engine's pool counters (see app.core.db_pool) and in-use gauge into Prometheus.
+    Idempotent per engine name: the API imports app.worker, which instruments the sync engine too.
+    """
+    gauge = _POOL_IN_USE.get(name)
+    if gauge is None or name in _INSTRUMENTED_ENGINES:
+        return
+    _INSTRUMENTED_ENGINES.add(name)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "checkout", lambda *args: gauge.inc())
+    event.listen(sync_engine, "checkin", lambda *args: gauge.dec())
+    stats = POOL_STATS.get(name)
+    if stats is not None:
+        stats.listeners.append(lambda waited, overflowed, timed_out: _record_pool_checkout(name, waited, overflowed, timed_out))
+
+
+def _registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_latest():
+    """(body, content type) for a scrape of this server (all processes in multi-process mode)."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def clear_multiprocess_dir():
+    """Remove samples of a previous run; call once, before any child process starts."""
+    if not MULTIPROCESS:
+        return
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    for filename in os.listdir(path):
+        if filename.endswith(".db"):
+            os.remove(os.path.join(path, filename))
+
+
+def start_exporter(port: int):
+    """Serve /metrics on `port` from a background thread (worker main process)."""
+    start_http_server(port, registry=_registry())
+
+
+def mark_process_dead(pid: Optional[int] = None):
+    """Drop the live gauges of an exiting process (multi-process mode)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
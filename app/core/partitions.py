@@ -0,0 +1,202 @@
+"""
+Time-Partitioned Tables (PostgreSQL).
+`job_logs` (and optionally `jobs`) as declaratively range-partitioned tables, so that
+retention can drop whole expired partitions instead of deleting rows.
+
+The partitioned parents are created from the ORM tables themselves, with the partition
+column added to the primary key (a PostgreSQL requirement) and `PARTITION BY RANGE`.
+The ORM keeps mapping `id` as the identity. Partitions are named
+`<table>_p<YYYYMMDD>` after their first day; `ensure_partitions` keeps
+`PARTITION_PREMAKE` future partitions ready, and a DEFAULT partition catches rows if
+maintenance falls behind. Rows that landed there are moved into their partition when it is
+created (the DEFAULT partition is detached meanwhile: PostgreSQL refuses to create a
+partition whose range the DEFAULT partition already holds rows for).
+
+Tables that already exist unpartitioned are left as they are (retention falls back to
+batched deletes for them); converting one is a manual migration.
+"""
+import datetime
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Integer, MetaData, PrimaryKeyConstraint, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+
+from app.core.config import settings
+from app.core.database import Base
+
+# Table -> partition column
+PARTITION_COLUMNS = {
+    "job_logs": "timestamp",
+    "jobs": "created_at",
+}
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+def enabled_tables() -> List[str]:
+    tables = []
+    if settings.PARTITION_JOBS:
+        tables.append("jobs")
+    if settings.PARTITION_JOB_LOGS:
+        tables.append("job_logs")
+    return tables
+
+
+def period_start(moment: datetime.datetime) -> datetime.datetime:
+    """Start of the `PARTITION_INTERVAL` period (day, week or month) containing `moment`."""
+    day = datetime.datetime(moment.year, moment.month, moment.day)
+    if settings.PARTITION_INTERVAL == "day":
+        return day
+    if settings.PARTITION_INTERVAL == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if settings.PARTITION_INTERVAL == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown PARTITION_INTERVAL {settings.PARTITION_INTERVAL!r}")
+
+
+def next_period(start: datetime.datetime) -> datetime.datetime:
+    if settings.PARTITION_INTERVAL == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + datetime.timedelta(days=7 if settings.PARTITION_INTERVAL == "week" else 1)
+
+
+def _partitioned_tables() -> Dict[str, object]:
+    """
+    Copies of the ORM tables to create before `create_all` (in a private MetaData): the
+    partitioned parents, and job_logs without its foreign key when jobs is partitioned.
+    """
+    metadata = MetaData()
+    tables = {name: Base.metadata.tables[name].to_metadata(metadata) for name in PARTITION_COLUMNS}
+    partitioned = enabled_tables()
+    for name in partitioned:
+        table = tables[name]
+        column = PARTITION_COLUMNS[name]
+        table.c[column].nullable = False
+        table.c[column].primary_key = True
+        id_column = table.c.id
+        table.append_constraint(PrimaryKeyConstraint(id_column, table.c[column]))
+        if isinstance(id_column.type, Integer):
+            id_column.autoincrement = True  # stays SERIAL in a composite key
+        table.dialect_options["postgresql"]["partition_by"] = f"RANGE ({column})"
+    if "jobs" in partitioned:
+        # The primary key of a partitioned jobs table is (id, created_at), so job_logs
+        # cannot reference jobs.id any more; logs are cleaned up by retention instead.
+        logs = tables["job_logs"]
+        for constraint in list(logs.foreign_key_constraints):
+            logs.constraints.discard(constraint)
+        for column in logs.columns:
+            column.foreign_keys.clear()
+        return tables
+    return {name: tables[name] for name in partitioned}
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": table}).first() is not None
+
+
+def _table_exists(conn: Connection, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is not None
+
+
+def list_partitions(conn: Connection, table: str) -> List[Partition]:
+    """Range partitions of `table`, oldest first (the DEFAULT partition is not listed)."""
+    rows = conn.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+    ), {"table": table}).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound or "")
+        if match:
+            start, end = (datetime.datetime.fromisoformat(value) for value in match.groups())
+            partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def ensure_partitions(conn: Connection, table: str, now: Optional[datetime.datetime] = None) -> List[str]:
+    """
+    Create the partitions from the current period up to `PARTITION_PREMAKE` periods ahead
+    (and the DEFAULT partition). Idempotent; returns the names of new partitions.
+    """
+    now = now or datetime.datetime.utcnow()
+    existing = {partition.start for partition in list_partitions(conn, table)}
+    created = []
+    start = period_start(now)
+    for _ in range(settings.PARTITION_PREMAKE + 1):
+        end = next_period(start)
+        if start not in existing:
+            name = f"{table}_p{start:%Y%m%d}"
+            try:
+                # One savepoint per partition: a failure skips it, not the whole run
+                with conn.begin_nested():
+                    _create_partition(conn, table, name, start, end)
+                created.append(name)
+            except DBAPIError as e:
+                print(f"Could not create partition {name} of {table} (retrying next run): {e}")
+        start = end
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+    return created
+
+
+def _create_partition(conn: Connection, table: str, name: str, start: datetime.datetime, end: datetime.datetime):
+    """Create partition `name` for [start, end), moving rows of that range out of the DEFAULT partition."""
+    default = f"{table}_default"
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    if not _table_exists(conn, default):
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bounds}'))
+        return
+    column = PARTITION_COLUMNS[table]
+    in_range = f'"{column}" >= :start AND "{column}" < :end'
+    params = {"start": start, "end": end}
+    if not conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_range})'), params).scalar():
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bounds}'))
+        return
+    # Writes to the table wait for the transaction; re-attaching validates the DEFAULT
+    # partition against the new bounds
+    conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"'))
+    conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{table}" {bounds}'))
+    moved = conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE {in_range} RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), params).rowcount
+    conn.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT'))
+    print(f"Moved {moved} rows of {table} from {default} to {name}")
+
+
+def create_partitioned_tables(conn: Connection):
+    """
+    Create the enabled partitioned parents that do not exist yet, plus their current
+    partitions. Run before `Base.metadata.create_all`, which then skips these tables.
+    PostgreSQL only; a no-op elsewhere.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    tables = _partitioned_tables()
+    partitioned = enabled_tables()
+    # jobs first: job_logs may reference it
+    for name in ("jobs", "job_logs"):
+        if name not in tables:
+            continue
+        if not _table_exists(conn, name):
+            conn.execute(CreateTable(tables[name]))
+        if name not in partitioned:
+            continue
+        if is_partitioned(conn, name):
+            ensure_partitions(conn, name)
+        else:
+            print(f"Table {name} exists unpartitioned; retention will delete its rows in batches.")
@@ -0,0 +1,37 @@
+"""
+Shared Redis Clients.
+Lazily created, process-wide clients for the task event bus and status cache.
+Separate from the Celery broker/result backend connections.
+"""
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_sync_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+
+def get_sync_redis() -> redis.Redis:
+    """Client for the worker (sync). The connection pool re-creates itself after fork."""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _sync_client
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Client for the API event loop."""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _async_client
+
+
+async def close_async_redis():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
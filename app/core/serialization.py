@@ -0,0 +1,205 @@
+"""
+Serialization Codecs.
+One place that decides how JSON and Celery payloads are encoded.
+
+* API: `dumps` / `loads` (status cache, SSE frames, event bus) and `FastJSONResponse` for
+  bodies the endpoints build themselves. `API_JSON_CODEC` selects `orjson` or stdlib `json`;
+  both produce the same JSON. Endpoints with a `response_model` keep FastAPI's own
+  serializer (pydantic, already native code).
+* Celery: `CELERY_SERIALIZER` selects the message and result format:
+    json     kombu's stdlib JSON codec (default); datetimes, dates, UUIDs and Decimals
+             round-trip with their type
+    orjson   opt-in: kombu's `application/json` wire format (including its envelopes for
+             datetimes, dates and Decimals), encoded and decoded with orjson, so processes
+             on either setting exchange messages. UUIDs arrive as their string: orjson
+             encodes them natively, and rewriting them into envelopes first would cost
+             more than orjson saves. Select it only where no task argument or result
+             carries a UUID object (this repo's tasks pass ids as strings)
+    msgpack  binary; datetimes, dates, UUIDs and Decimals round-trip with their type
+
+API output: datetimes are ISO 8601 (naive ones stay naive, as FastAPI renders them), UUIDs
+and Decimals strings, NumPy arrays/scalars plain lists/numbers, anything else str(). In
+Celery messages NumPy values become lists/numbers too; other unknown types fail.
+"""
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, Callable
+
+from kombu.serialization import register
+from kombu.utils import json as kombu_json
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional: only needed when selected
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CELERY_SERIALIZERS = ("json", "orjson", "msgpack")
+
+# msgpack extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_UUID = 3
+EXT_DECIMAL = 4
+
+
+def _encode_default(obj: Any) -> Any:
+    """Fallback for types the encoders do not handle natively (Celery: unknown types fail)."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _default(obj: Any) -> Any:
+    """API fallback: anything else is rendered with str(), like the former `default=str`."""
+    try:
+        return _encode_default(obj)
+    except TypeError:
+        return str(obj)
+
+
+def _require(module, name: str):
+    if module is None:
+        raise RuntimeError(f"{name} is selected in settings but not installed (pip install {name})")
+    return module
+
+
+# --- JSON (API side) ---
+
+if settings.API_JSON_CODEC == "orjson":
+    _ORJSON_OPTIONS = (
+        _require(orjson, "orjson").OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS
+    )
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    loads: Callable[[Any], Any] = orjson.loads
+elif settings.API_JSON_CODEC == "json":
+    def dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    loads = json.loads
+else:
+    raise ValueError(f"Unknown API_JSON_CODEC: {settings.API_JSON_CODEC}")
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured codec."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+# --- Celery ---
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    if isinstance(obj, decimal.Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+    return _encode_default(obj)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    if code == EXT_DECIMAL:
+        return decimal.Decimal(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+
+def msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+_KOMBU_ENCODER = kombu_json.JSONEncoder()
+
+
+def _celery_json_default(obj: Any) -> Any:
+    # kombu's {"__type__", "__value__"} envelopes, so stock json consumers decode the same types
+    try:
+        return _KOMBU_ENCODER.default(obj)
+    except TypeError:
+        return _encode_default(obj)
+
+
+def orjson_celery_dumps(obj: Any) -> str:
+    return orjson.dumps(
+        obj,
+        default=_celery_json_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    ).decode()
+
+
+def orjson_celery_loads(data: Any) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if (b'"__type__"' if isinstance(data, (bytes, bytearray)) else '"__type__"') in data:
+        # typed values need kombu's object hook
+        return kombu_json.loads(data)
+    return orjson.loads(data)
+
+
+def register_celery_codecs(serializer: str):
+    """
+    Register the codec selected by `serializer` with kombu (the stock json codec needs
+    no registration). Returns the names to list in `accept_content`: everything this
+    process can decode, so producers on other settings keep working during a change.
+    """
+    if serializer not in CELERY_SERIALIZERS:
+        raise ValueError(f"Unknown CELERY_SERIALIZER: {serializer}")
+    accept = ["json"]
+    if serializer == "orjson":
+        _require(orjson, "orjson")
+        # Same content type as kombu's json: decoding application/json now goes through orjson
+        register("orjson", orjson_celery_dumps, orjson_celery_loads, content_type="application/json", content_encoding="utf-8")
+        accept.append("orjson")
+    if msgpack is not None:
+        register("msgpack", msgpack_dumps, msgpack_loads, content_type="application/x-msgpack", content_encoding="binary")
+        accept.append("msgpack")
+    elif serializer == "msgpack":
+        _require(msgpack, "msgpack")
+    return accept
@@ -0,0 +1,212 @@
+"""
+Task Status Cache.
+Two-tier read cache for GET /tasks/{task_id}: an in-process LRU in front of Redis.
+
+Every write to a job (worker hooks, RUNNING transition, log flush, cancellation) bumps a
+per-task version counter in Redis. Cached bodies carry the version they were built from,
+and the version doubles as the ETag, so a poll with a matching `If-None-Match` is answered
+with 304 from Redis alone, without touching PostgreSQL.
+
+Terminal jobs never change again and are cached without expiry; active jobs only for a
+short TTL in each tier. A job can have several cached bodies ("variants", e.g. with or
+without logs); they share the job's version and are invalidated together.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from app.core import serialization
+from app.core.config import settings
+from app.core.redis_client import get_async_redis, get_sync_redis
+
+TERMINAL_STATUSES = {"SUCCESS", "FAILED", "CANCELLED"}
+
+VERSION_KEY = "task-status:version:{}"
+BODY_KEY = "task-status:body:{}"
+
+
+def make_etag(task_id: str, version: int, variant: str = "") -> str:
+    suffix = f"-{variant}" if variant else ""
+    return f'"{task_id}-{version}{suffix}"'
+
+
+@dataclass
+class CacheEntry:
+    task_id: str
+    variant: str
+    version: int
+    body: Dict[str, Any]
+    terminal: bool
+    expires_at: Optional[float] = None
+
+    @property
+    def etag(self) -> str:
+        return make_etag(self.task_id, self.version, self.variant)
+
+
+class StatusCache:
+    """
+    API-side cache. One instance per process.
+    """
+
+    def __init__(self, local_size: int, local_ttl: float, redis_ttl: int, terminal_ttl: int):
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.terminal_ttl = terminal_ttl
+        # task_id -> {variant: entry}; LRU order is per task
+        self._local: "OrderedDict[str, Dict[str, CacheEntry]]" = OrderedDict()
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "not_modified": 0}
+
+    # --- Local tier ---
+
+    def _get_local(self, task_id: str, variant: str) -> Optional[CacheEntry]:
+        variants = self._local.get(task_id)
+        entry = variants.get(variant) if variants else None
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at < time.monotonic():
+            del variants[variant]
+            return None
+        self._local.move_to_end(task_id)
+        return entry
+
+    def _put_local(self, entry: CacheEntry):
+        entry.expires_at = None if entry.terminal else time.monotonic() + self.local_ttl
+        self._local.setdefault(entry.task_id, {})[entry.variant] = entry
+        self._local.move_to_end(entry.task_id)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def evict_local(self, task_id: str, event: Any = None):
+        """Drop all local variants of a task. Registered as a task event hub callback."""
+        self._local.pop(task_id, None)
+
+    # --- Read path ---
+
+    async def lookup(self, task_id: str, variant: str = "") -> Tuple[Optional[CacheEntry], Optional[int], bool]:
+        """
+        Return (entry, current_version, version_known). The entry is None on a miss; the
+        version is None only if Redis is unavailable, and 0 if the task has no version
+        key. `version_known` is False then: an unknown task id has no version key either,
+        so a missing key alone must not confirm an ETag.
+        """
+        entry = self._get_local(task_id, variant)
+        if entry is not None:
+            self.counters["local_hits"] += 1
+            return entry, entry.version, True
+
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            pipe.get(VERSION_KEY.format(task_id))
+            pipe.hget(BODY_KEY.format(task_id), variant)
+            raw_version, raw_body = await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Status cache unavailable: {e}")
+            self.counters["misses"] += 1
+            return None, None, False
+
+        version = int(raw_version or 0)
+        if raw_body is not None:
+            cached = serialization.loads(raw_body)
+            # A body built from an older version is stale: the job changed since.
+            if cached["version"] == version:
+                entry = CacheEntry(task_id, variant, version, cached["body"], cached["terminal"])
+                self._put_local(entry)
+                self.counters["redis_hits"] += 1
+                return entry, version, True
+
+        self.counters["misses"] += 1
+        return None, version, raw_version is not None
+
+    async def store(
+        self, task_id: str, version: Optional[int], body: Dict[str, Any], status: str, variant: str = ""
+    ) -> CacheEntry:
+        """Cache a body freshly read from the database under the version read before the query."""
+        terminal = status in TERMINAL_STATUSES
+        entry = CacheEntry(task_id, variant, version or 0, body, terminal)
+        if version is None:
+            # Redis is down: serve the body, but do not cache what we cannot invalidate.
+            return entry
+
+        self._put_local(entry)
+        ttl = self.terminal_ttl if terminal else self.redis_ttl
+        try:
+            value = serialization.dumps_bytes({"version": entry.version, "body": body, "terminal": terminal})
+            pipe = get_async_redis().pipeline(transaction=False)
+            pipe.hset(BODY_KEY.format(task_id), variant, value)
+            if ttl:
+                pipe.expire(BODY_KEY.format(task_id), ttl)
+            else:
+                pipe.persist(BODY_KEY.format(task_id))
+            if terminal:
+                # An expired version key would restart at 0 and repeat ETags that clients
+                # may still hold (a false 304): keep it at least as long as the body.
+                version_key = VERSION_KEY.format(task_id)
+                pipe.set(version_key, entry.version, nx=True)
+                if ttl:
+                    pipe.expire(version_key, ttl + settings.STATUS_CACHE_VERSION_TTL)
+                else:
+                    pipe.persist(version_key)
+            await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Status cache write failed: {e}")
+        return entry
+
+    def record_not_modified(self):
+        self.counters["not_modified"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["local_hits"] + self.counters["redis_hits"] + self.counters["misses"]
+        hits = self.counters["local_hits"] + self.counters["redis_hits"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._local),
+        }
+
+
+def _queue_invalidation(pipe, task_id: str):
+    version_key = VERSION_KEY.format(task_id)
+    pipe.incr(version_key)
+    pipe.expire(version_key, settings.STATUS_CACHE_VERSION_TTL)
+    pipe.delete(BODY_KEY.format(task_id))
+
+
+def invalidate_task_status(*task_ids: str):
+    """
+    Bump the version of each task (worker side, sync). Must be called after the DB commit.
+    """
+    if not task_ids:
+        return
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        for task_id in task_ids:
+            _queue_invalidation(pipe, task_id)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Status cache invalidation failed: {e}")
+
+
+async def invalidate_task_status_async(*task_ids: str):
+    """API-side variant of `invalidate_task_status`."""
+    for task_id in task_ids:
+        status_cache.evict_local(task_id)
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        for task_id in task_ids:
+            _queue_invalidation(pipe, task_id)
+        await pipe.execute()
+    except redis.RedisError as e:
+        print(f"Status cache invalidation failed: {e}")
+
+
+status_cache = StatusCache(
+    local_size=settings.STATUS_CACHE_LOCAL_SIZE,
+    local_ttl=settings.STATUS_CACHE_LOCAL_TTL,
+    redis_ttl=settings.STATUS_CACHE_REDIS_TTL,
+    terminal_ttl=settings.STATUS_CACHE_TERMINAL_TTL,
+)
@@ -38,9 +38,11 @@ def instrument_fastapi(app):
         # SQLAlchemyInstrumentor().instrument(enable_commenter=True, comment_check_query=True)
 
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
+from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 
 def instrument_celery(app):
      if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
         CeleryInstrumentor().instrument()
         RequestsInstrumentor().instrument()
+        HTTPXClientInstrumentor().instrument()
         # SQLAlchemyInstrumentor().instrument(enable_commenter=True, comment_check_query=True)
@@ -7,7 +7,11 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from app.core.config import settings
-from app.core.database import init_db
+from app.core import metrics
+from app.core.database import engine, init_db, sync_engine
+from app.core.events import event_hub
+from app.core.redis_client import close_async_redis
+from app.core.status_cache import status_cache
 from app.api.router import api_router
 # Import models to ensure they are registered with Base.metadata before create_all
 import app.models.job
@@ -23,6 +27,11 @@ app = FastAPI(title=settings.PROJECT_NAME)
 # Instrument FastAPI: Automatically generates spans for every request.
 instrument_fastapi(app)
 
+# Prometheus: latency of the submit/status endpoints and DB pool usage (see GET /metrics)
+app.add_middleware(metrics.LatencyMiddleware)
+metrics.instrument_engine(engine, "async")
+metrics.instrument_engine(sync_engine, "sync")
+
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 @app.on_event("startup")
@@ -34,6 +43,16 @@ async def on_startup():
         # Keep running to allow diagnosis, or re-raise if fatal
         # raise e
 
+    # Task events from workers and other API processes evict stale local cache entries
+    event_hub.add_callback(status_cache.evict_local)
+    event_hub.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await event_hub.close()
+    await close_async_redis()
+    metrics.mark_process_dead()
+
 @app.get("/")
 async def read_root():
     return FileResponse('app/static/index.html')
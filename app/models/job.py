@@ -2,8 +2,9 @@
 SQLAlchemy Data Models.
 Defines the database schema for Jobs and Logs.
 """
-from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON, LargeBinary, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
+from app.core.compression import packed_json
 from app.core.database import Base
 import uuid
 import datetime
@@ -28,8 +29,15 @@ class Job(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     status = Column(String, default=JobStatus.PENDING.value)
-    input_payload = Column(JSON, nullable=True)
-    result_payload = Column(JSON, nullable=True)
+    # Large payloads are stored compressed in the *_packed columns, with only their scalar
+    # fields left in the JSON columns (see app/core/compression.py). Read and write them
+    # through `input_payload` / `result_payload`.
+    input_payload_json = Column("input_payload", JSON, nullable=True)
+    input_payload_packed = Column(LargeBinary, nullable=True)
+    result_payload_json = Column("result_payload", JSON, nullable=True)
+    result_payload_packed = Column(LargeBinary, nullable=True)
+    input_payload = packed_json("input_payload", "input_payload_json", "input_payload_packed")
+    result_payload = packed_json("result_payload", "result_payload_json", "result_payload_packed")
     retry_count = Column(Integer, default=0)
     
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -38,6 +46,19 @@ class Job(Base):
 
     logs = relationship("JobLog", back_populates="job", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination for GET /tasks: ORDER BY created_at DESC, id DESC
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        # Backlog estimation only reads unfinished jobs; keep that index small
+        Index(
+            "ix_jobs_active_status", "status",
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')"),
+            sqlite_where=text("status IN ('PENDING', 'RUNNING')"),
+        ),
+        # Retention: expired jobs of a status, in keyset order
+        Index("ix_jobs_status_completed_at_id", "status", "completed_at", "id"),
+    )
+
 class JobLog(Base):
     """
     Detailed log entry for a specific job.
@@ -52,3 +73,25 @@ class JobLog(Base):
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
     job = relationship("Job", back_populates="logs")
+
+    __table_args__ = (
+        # Log lookup per job, already in display order
+        Index("ix_job_logs_job_id_timestamp", "job_id", "timestamp"),
+        # Incremental tailing: WHERE job_id = ? AND id > after_id ORDER BY id
+        Index("ix_job_logs_job_id_id", "job_id", "id"),
+    )
+
+class JobRunStats(Base):
+    """
+    Rollup of finished job run times per task type and `duration` bucket.
+    Updated incrementally by the worker as each job finishes (one upsert), and read by
+    the backlog estimator instead of scanning the jobs table.
+    """
+    __tablename__ = "job_run_stats"
+
+    task_type = Column(String, primary_key=True)
+    duration_bucket = Column(String, primary_key=True)
+    runs = Column(Integer, nullable=False, default=0)
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    ewma_seconds = Column(Float, nullable=False, default=0.0)  # recent runs weigh more
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
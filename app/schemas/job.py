@@ -19,6 +19,7 @@ class TaskType(str, Enum):
     """Supported task types for dispatching."""
     VECTOR = "vector_processing"
     SCRAPE = "web_scrape"
+    SCRAPE_BATCH = "web_scrape_batch"
 
 class TaskCreate(BaseModel):
     """
@@ -26,16 +27,33 @@ class TaskCreate(BaseModel):
     Supports both Vector Processing and Web Scraping.
     """
     vector_data: Optional[List[float]] = None # For VECTOR tasks
+    dimension: Optional[int] = Field(None, gt=0) # Vector size; vector_data holds len/dimension vectors
     metadata: dict
     duration: int = 10
     url: Optional[str] = None # For SCRAPE tasks
+    urls: Optional[List[str]] = None # For SCRAPE_BATCH tasks
     task_type: TaskType = TaskType.VECTOR
 
 class TaskResponse(BaseModel):
+    """
+    `memo` is set when no new work was queued: "hit" (an identical task already
+    succeeded; `result` holds its result) or "coalesced" (attached to an identical
+    task that is still running; `task_id` is that task).
+    """
     task_id: str
     status: str
+    memo: Optional[str] = None
+    result: Optional[Any] = None
+
+class TaskBatchResponse(BaseModel):
+    """
+    Result of a bulk submission. Task IDs are returned in request order.
+    """
+    task_ids: List[str]
+    status: str
 
 class LogEntry(BaseModel):
+    id: int
     timestamp: datetime
     level: str
     message: str
@@ -43,9 +61,9 @@ class LogEntry(BaseModel):
     class Config:
         from_attributes = True
 
-class TaskStatusResponse(BaseModel):
+class TaskSummary(BaseModel):
     """
-    Full details of a job, including status, results, and execution logs.
+    Status, results, and timestamps of a job, without its execution logs.
     """
     id: str = Field(..., serialization_alias="task_id")
     status: str
@@ -54,7 +72,20 @@ class TaskStatusResponse(BaseModel):
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     retry_count: int = 0
-    logs: List[LogEntry] = []
 
     class Config:
         from_attributes = True
+
+class TaskStatusResponse(TaskSummary):
+    """
+    Full details of a job, including status, results, and execution logs.
+    """
+    logs: List[LogEntry] = []
+
+class TaskListResponse(BaseModel):
+    """
+    One page of jobs, newest first.
+    Pass `next_cursor` back as `cursor` to fetch the following page; it is null on the last page.
+    """
+    items: List[TaskSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,148 @@
+"""
+Backlog Estimation.
+Turns the queue into an amount of work, for autoscaling (e.g. a KEDA metrics-api scaler).
+
+Message counts treat a one-hour vector job and a five-second scrape alike. Instead, every
+pending job is weighted by the historical run time of its task type and `duration`
+bucket, read from the `job_run_stats` rollup that the worker updates as jobs finish.
+Running jobs contribute their expected remaining time. Dividing the total by the number
+of worker slots gives the drain time.
+"""
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobRunStats, JobStatus
+from app.services.job_state import DURATION, TASK_TYPE
+
+# Upper bounds (seconds) of the `duration` buckets; larger values fall in the last one
+DURATION_BUCKETS = (10, 60, 300, 1800)
+
+# Weight of the newest run in `ewma_seconds`
+EWMA_ALPHA = 0.2
+
+
+def duration_bucket(duration: Optional[int]) -> str:
+    if duration is None:
+        return "unknown"
+    for bound in DURATION_BUCKETS:
+        if duration <= bound:
+            return f"le_{bound}"
+    return f"gt_{DURATION_BUCKETS[-1]}"
+
+
+def _insert_for(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"job_run_stats upsert is not implemented for {dialect}")
+
+
+def record_run(db: Session, task_type: Optional[str], duration: Optional[int], seconds: float):
+    """
+    Add one finished run to the rollup (single upsert; the caller commits, so it shares
+    the transaction of the status change).
+    """
+    if not task_type or seconds < 0:
+        return
+    insert = _insert_for(db)
+    stmt = insert(JobRunStats).values(
+        task_type=task_type,
+        duration_bucket=duration_bucket(duration),
+        runs=1,
+        total_seconds=seconds,
+        ewma_seconds=seconds,
+        updated_at=datetime.datetime.utcnow(),
+    )
+    stats = JobRunStats.__table__.c
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[stats.task_type, stats.duration_bucket],
+        set_={
+            "runs": stats.runs + 1,
+            "total_seconds": stats.total_seconds + stmt.excluded.total_seconds,
+            "ewma_seconds": stats.ewma_seconds + EWMA_ALPHA * (stmt.excluded.ewma_seconds - stats.ewma_seconds),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+class RunTimeModel:
+    """Expected run time per (task_type, bucket), falling back to the task type, then to defaults."""
+
+    def __init__(self, rows: Iterable[JobRunStats]):
+        self.by_bucket: Dict[tuple, float] = {}
+        totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        for row in rows:
+            if row.runs:
+                self.by_bucket[(row.task_type, row.duration_bucket)] = row.ewma_seconds
+                totals[row.task_type][0] += row.runs
+                totals[row.task_type][1] += row.total_seconds
+        self.by_type = {task_type: total / runs for task_type, (runs, total) in totals.items()}
+
+    def expected(self, task_type: Optional[str], duration: Optional[int]) -> float:
+        estimate = self.by_bucket.get((task_type, duration_bucket(duration)))
+        if estimate is None:
+            estimate = self.by_type.get(task_type)
+        if estimate is None:
+            estimate = float(duration) if duration else settings.BACKLOG_DEFAULT_RUN_SECONDS
+        return estimate
+
+
+async def queue_depths(redis_client, queues: Iterable[str]) -> Dict[str, int]:
+    """Messages waiting in each Celery queue (Redis broker: one list per queue)."""
+    depths = {}
+    for queue in queues:
+        depths[queue] = int(await redis_client.llen(queue))
+    return depths
+
+
+async def backlog_report(db: AsyncSession, redis_client, queues: Iterable[str], worker_slots: int) -> Dict[str, Any]:
+    """
+    Queue depth, in-flight jobs and the estimated work (seconds) and drain time.
+    Reads the rollup and the unfinished jobs only (both indexed); no history scan.
+    """
+    model = RunTimeModel((await db.execute(select(JobRunStats))).scalars().all())
+    now = datetime.datetime.utcnow()
+
+    by_type: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+        "pending": 0, "in_flight": 0, "pending_work_seconds": 0.0, "in_flight_remaining_seconds": 0.0,
+    })
+    pending_rows = await db.execute(
+        select(TASK_TYPE, DURATION, Job.status, Job.started_at)
+        .where(Job.status.in_((JobStatus.PENDING.value, JobStatus.RUNNING.value)))
+    )
+    for task_type, duration, status, started_at in pending_rows:
+        entry = by_type[task_type or "unknown"]
+        expected = model.expected(task_type, duration)
+        if status == JobStatus.PENDING.value:
+            entry["pending"] += 1
+            entry["pending_work_seconds"] += expected
+        else:
+            entry["in_flight"] += 1
+            elapsed = (now - started_at).total_seconds() if started_at else 0.0
+            entry["in_flight_remaining_seconds"] += max(0.0, expected - elapsed)
+
+    pending_work = sum(e["pending_work_seconds"] for e in by_type.values())
+    remaining = sum(e["in_flight_remaining_seconds"] for e in by_type.values())
+    slots = max(1, worker_slots)
+    return {
+        "queues": await queue_depths(redis_client, queues),
+        "pending_jobs": sum(int(e["pending"]) for e in by_type.values()),
+        "in_flight": sum(int(e["in_flight"]) for e in by_type.values()),
+        "pending_work_seconds": round(pending_work, 1),
+        "in_flight_remaining_seconds": round(remaining, 1),
+        "worker_slots": slots,
+        "estimated_drain_seconds": round((pending_work + remaining) / slots, 1),
+        "by_task_type": {
+            task_type: {key: round(value, 1) if isinstance(value, float) else value for key, value in entry.items()}
+            for task_type, entry in by_type.items()
+        },
+    }
@@ -0,0 +1,217 @@
+"""
+Claim-Check Blob Store.
+Large task payloads are written once to a blob store; the Job row and the Celery message
+only carry a small reference (`BlobRef`) with the checksum.
+
+Blobs are content-addressed (key = SHA-256 of the bytes), so identical payloads are stored
+once. The worker reads them through a memory map: no copy into Python objects, and the
+OS pages data in as the chunk engine touches it.
+
+Because blobs are shared, they are deleted by retention (app.services.retention) only once
+no job references their key any more, and only if nothing stored the same content within
+`BLOB_GC_GRACE_SECONDS` (an upload whose job row is not written yet).
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class BlobIntegrityError(Exception):
+    """Stored bytes do not match the checksum in the reference."""
+
+
+@dataclass
+class BlobRef:
+    """
+    Reference stored in place of the payload. `dtype`/`shape` describe array blobs.
+    """
+    key: str
+    sha256: str
+    size: int
+    backend: str = "local"
+    dtype: Optional[str] = None
+    shape: Optional[List[int]] = field(default=None)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BlobRef":
+        return cls(**data)
+
+
+class BlobStore:
+    """
+    Interface for claim-check storage backends.
+    """
+    backend = "base"
+
+    def writer(self) -> "BlobWriter":
+        """Start an incremental upload (for request bodies streamed chunk by chunk)."""
+        raise NotImplementedError
+
+    def put(self, chunks: Iterable[bytes]) -> BlobRef:
+        """Store a stream of byte chunks and return its reference."""
+        raise NotImplementedError
+
+    def open(self, ref: BlobRef) -> memoryview:
+        """Return a read-only, zero-copy view of the blob."""
+        raise NotImplementedError
+
+    def delete(self, ref: BlobRef, older_than: Optional[float] = None) -> bool:
+        """
+        Remove the blob. With `older_than` (a timestamp), only if it was last stored
+        before then. Returns whether it was removed.
+        """
+        raise NotImplementedError
+
+    def put_array(self, array: np.ndarray) -> BlobRef:
+        array = np.ascontiguousarray(array)
+        ref = self.put([memoryview(array).cast("B")])
+        ref.dtype = array.dtype.str
+        ref.shape = list(array.shape)
+        return ref
+
+    def open_array(self, ref: BlobRef, verify: bool = True) -> np.ndarray:
+        """
+        Map an array blob. Pages are copy-on-write: in-place edits (e.g. normalization)
+        stay private to the process and never touch the stored blob.
+        """
+        raise NotImplementedError
+
+
+class BlobWriter:
+    """
+    Incremental upload: `write` chunks, then `commit` (or `abort`). Hashes as it writes,
+    so the payload is never held in memory as a whole.
+    """
+
+    size = 0
+
+    def write(self, chunk: bytes):
+        raise NotImplementedError
+
+    def commit(self) -> BlobRef:
+        raise NotImplementedError
+
+    def abort(self):
+        raise NotImplementedError
+
+
+class LocalBlobWriter(BlobWriter):
+    """
+    Writes to a temp file in the store root, then renames it to its content key.
+    """
+
+    def __init__(self, store: "LocalBlobStore"):
+        self.store = store
+        os.makedirs(store.root, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=store.root, prefix=f".upload-{uuid.uuid4().hex}-")
+        self._file = os.fdopen(fd, "wb")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self._digest.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> BlobRef:
+        self._file.close()
+        key = self._digest.hexdigest()
+        path = self.store._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Same content already stored: mark it as stored again, so retention does
+            # not delete it under the new reference
+            os.utime(path)
+        except FileNotFoundError:
+            os.replace(self.tmp_path, path)
+        else:
+            os.remove(self.tmp_path)
+        return BlobRef(key=key, sha256=key, size=self.size, backend=self.store.backend)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Filesystem backend. Layout: <root>/<key[:2]>/<key>.
+    The root must be shared between API and worker (e.g. a mounted volume).
+    """
+    backend = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def writer(self) -> "LocalBlobWriter":
+        return LocalBlobWriter(self)
+
+    def put(self, chunks: Iterable[bytes]) -> BlobRef:
+        writer = self.writer()
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def open(self, ref: BlobRef) -> memoryview:
+        with open(self._path(ref.key), "rb") as f:
+            if ref.size == 0:
+                return memoryview(b"")
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def delete(self, ref: BlobRef, older_than: Optional[float] = None) -> bool:
+        path = self._path(ref.key)
+        try:
+            if older_than is not None and os.path.getmtime(path) >= older_than:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def open_array(self, ref: BlobRef, verify: bool = True) -> np.ndarray:
+        path = self._path(ref.key)
+        if verify:
+            self.verify(ref)
+        return np.memmap(path, dtype=np.dtype(ref.dtype), mode="c", shape=tuple(ref.shape))
+
+    def verify(self, ref: BlobRef):
+        """Hash the mapped bytes (one sequential pass, no copy)."""
+        view = self.open(ref)
+        try:
+            if len(view) != ref.size or hashlib.sha256(view).hexdigest() != ref.sha256:
+                raise BlobIntegrityError(f"Blob {ref.key} does not match its reference")
+        finally:
+            view.release()
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the configured backend (process-wide singleton)."""
+    global _store
+    if _store is None:
+        if settings.BLOB_STORE_BACKEND == "local":
+            _store = LocalBlobStore(settings.BLOB_STORE_PATH)
+        else:
+            raise ValueError(f"Unknown BLOB_STORE_BACKEND: {settings.BLOB_STORE_BACKEND}")
+    return _store
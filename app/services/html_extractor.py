@@ -0,0 +1,226 @@
+"""
+Streaming HTML Extractor.
+Single-pass, event-based page metadata extraction for the scraper.
+
+The page is fed to the extractor chunk by chunk while it downloads; no document tree is
+built. Each extracted field is produced by an `ExtractionRule` that only receives the
+events it asked for, so adding a field means registering a rule, not another traversal.
+Memory per page is bounded by the rules' own state (e.g. the capped title text).
+"""
+import codecs
+import re
+from functools import partial
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Attrs = List[Tuple[str, Optional[str]]]
+
+# Longest text a capturing rule keeps (titles beyond this are truncated)
+MAX_TEXT_CHARS = 2048
+# Bytes buffered to look for a <meta charset> before decoding starts
+CHARSET_SNIFF_BYTES = 1024
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([a-zA-Z0-9_.:-]+)", re.IGNORECASE)
+
+
+class ExtractionRule:
+    """
+    Base class for one extracted field. `name` is the output key; dots nest it
+    (e.g. "stats.links"). `tags` lists the start tags the rule wants to see.
+    """
+    name = ""
+    tags: Tuple[str, ...] = ()
+
+    def start(self, tag: str, attrs: Attrs) -> bool:
+        """Handle a start tag. Return True to receive the text until the matching end tag."""
+        return False
+
+    def data(self, text: str):
+        pass
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class TitleRule(ExtractionRule):
+    """Text of the first <title>; "No Title" if there is none."""
+    name = "title"
+    tags = ("title",)
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._seen = False
+
+    def start(self, tag: str, attrs: Attrs) -> bool:
+        if self._seen:
+            return False
+        self._seen = True
+        return True
+
+    def data(self, text: str):
+        if self._length < MAX_TEXT_CHARS:
+            text = text[:MAX_TEXT_CHARS - self._length]
+            self._parts.append(text)
+            self._length += len(text)
+
+    def result(self) -> Any:
+        if not self._seen:
+            return "No Title"
+        return "".join(self._parts) or None
+
+
+class MetaContentRule(ExtractionRule):
+    """`content` of the first <meta name=...> with the given name."""
+    tags = ("meta",)
+
+    def __init__(self, name: str, meta_name: str, default: Any = None):
+        self.name = name
+        self.meta_name = meta_name
+        self.default = default
+        self._value: Any = None
+        self._found = False
+
+    def start(self, tag: str, attrs: Attrs) -> bool:
+        if not self._found:
+            attributes = dict(attrs)
+            if (attributes.get("name") or "").lower() == self.meta_name:
+                self._found = True
+                self._value = attributes.get("content")
+        return False
+
+    def result(self) -> Any:
+        return self._value if self._found else self.default
+
+
+class TagCountRule(ExtractionRule):
+    """Number of occurrences of a tag."""
+
+    def __init__(self, name: str, tag: str):
+        self.name = name
+        self.tags = (tag,)
+        self.count = 0
+
+    def start(self, tag: str, attrs: Attrs) -> bool:
+        self.count += 1
+        return False
+
+    def result(self) -> Any:
+        return self.count
+
+
+RuleFactory = Callable[[], ExtractionRule]
+
+# Registered rules, in output order. Factories, because rules keep per-page state.
+RULES: Dict[str, RuleFactory] = {}
+
+
+def register_rule(name: str, factory: RuleFactory):
+    """Add (or replace) a rule used by every new extractor."""
+    RULES[name] = factory
+
+
+register_rule("title", TitleRule)
+register_rule("description", partial(MetaContentRule, "description", "description", "No description"))
+register_rule("stats.h1_tags", partial(TagCountRule, "stats.h1_tags", "h1"))
+register_rule("stats.links", partial(TagCountRule, "stats.links", "a"))
+register_rule("stats.images", partial(TagCountRule, "stats.images", "img"))
+
+
+class _RuleParser(HTMLParser):
+    """Dispatches parser events to the rules subscribed to each tag."""
+
+    def __init__(self, rules: List[ExtractionRule]):
+        super().__init__(convert_charrefs=True)
+        self.by_tag: Dict[str, List[ExtractionRule]] = {}
+        for rule in rules:
+            for tag in rule.tags:
+                self.by_tag.setdefault(tag, []).append(rule)
+        self.capturing: List[Tuple[str, ExtractionRule]] = []
+
+    def handle_starttag(self, tag, attrs):
+        for rule in self.by_tag.get(tag, ()):
+            if rule.start(tag, attrs):
+                self.capturing.append((tag, rule))
+
+    def handle_startendtag(self, tag, attrs):
+        # <img/>, <meta .../>: counted, but nothing to capture
+        for rule in self.by_tag.get(tag, ()):
+            rule.start(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self.capturing:
+            self.capturing = [(t, rule) for t, rule in self.capturing if t != tag]
+
+    def handle_data(self, data):
+        for _, rule in self.capturing:
+            rule.data(data)
+
+
+class StreamingExtractor:
+    """
+    Incremental extractor: `feed(chunk)` bytes as they arrive, then `close()` for the result.
+    """
+
+    def __init__(self, url: str, content_type: Optional[str] = None, rules: Optional[Dict[str, RuleFactory]] = None):
+        self.url = url
+        self.rules = [factory() for factory in (rules or RULES).values()]
+        self._parser = _RuleParser(self.rules)
+        self._decoder = None
+        self._pending = b""
+        self._encoding = None
+        if content_type:
+            match = _HEADER_CHARSET.search(content_type)
+            if match:
+                self._set_encoding(match.group(1))
+
+    def _set_encoding(self, name: str):
+        try:
+            self._encoding = codecs.lookup(name).name
+        except LookupError:
+            self._encoding = None
+
+    def feed(self, chunk: bytes):
+        if self._decoder is None:
+            # Hold back the first bytes until a <meta charset> could have been seen
+            self._pending += chunk
+            if len(self._pending) < CHARSET_SNIFF_BYTES:
+                return
+            self._start_decoding()
+            chunk, self._pending = self._pending, b""
+        self._parser.feed(self._decoder.decode(chunk))
+
+    def _start_decoding(self):
+        if self._encoding is None:
+            match = _META_CHARSET.search(self._pending[:CHARSET_SNIFF_BYTES])
+            if match:
+                self._set_encoding(match.group(1).decode("ascii"))
+        self._decoder = codecs.getincrementaldecoder(self._encoding or "utf-8")(errors="replace")
+
+    def close(self) -> Dict[str, Any]:
+        if self._decoder is None:
+            self._start_decoding()
+            self._parser.feed(self._decoder.decode(self._pending))
+            self._pending = b""
+        self._parser.feed(self._decoder.decode(b"", final=True))
+        self._parser.close()
+
+        result: Dict[str, Any] = {"url": self.url}
+        for rule in self.rules:
+            target = result
+            *parents, key = rule.name.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = rule.result()
+        return result
+
+
+def extract(url: str, content: Union[bytes, Iterable[bytes]], content_type: Optional[str] = None) -> Dict[str, Any]:
+    """Run the registered rules over a whole body or an iterable of chunks."""
+    extractor = StreamingExtractor(url, content_type)
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        content = [bytes(content)]
+    for chunk in content:
+        extractor.feed(chunk)
+    return extractor.close()
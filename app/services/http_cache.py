@@ -0,0 +1,256 @@
+"""
+Scraper HTTP Response Cache.
+On-disk cache of fetched pages, shared by the worker processes on a host.
+
+Bodies are stored as files; metadata lives in a SQLite index (WAL mode, safe for several
+processes). Entries honor `Cache-Control: max-age` / `Expires` for freshness and keep the
+`ETag` / `Last-Modified` validators, so a stale entry is revalidated with a conditional
+GET: an unchanged page costs one 304 round trip and reuses the cached extraction.
+The total body size is kept under a budget by evicting least-recently-used entries.
+"""
+import email.utils
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Mapping, Optional, Union
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL,
+    extractor_version TEXT,
+    extraction TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access);
+"""
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+    size: int
+    extractor_version: Optional[str]
+    extraction: Optional[Dict[str, Any]]
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def freshness_lifetime(headers: Mapping[str, str], default_ttl: float = 0) -> Optional[float]:
+    """
+    Seconds the response may be reused without revalidation, or None if it must not be stored.
+    """
+    cache_control = {}
+    for directive in headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            cache_control[name.lower()] = value.strip('"')
+
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    if "max-age" in cache_control:
+        try:
+            return max(0, int(cache_control["max-age"]))
+        except ValueError:
+            return 0
+    if "expires" in headers:
+        try:
+            expires = email.utils.parsedate_to_datetime(headers["expires"]).timestamp()
+            return max(0, expires - time.time())
+        except (TypeError, ValueError):
+            return 0
+    return default_ttl
+
+
+class BodyWriter:
+    """
+    Spools a response body into the cache while it downloads; `ResponseCache.store`
+    commits it (atomic rename) or discards it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.{id(self)}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(self.tmp_path, "wb")
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class ResponseCache:
+    """
+    Process-safe response cache. One instance per process; SQLite connections are per thread.
+    """
+
+    def __init__(self, root: str, max_bytes: int, default_ttl: float = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, "bodies"), exist_ok=True)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _body_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.root, "bodies", digest[:2], digest)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        row = self._db.execute(
+            "SELECT url, etag, last_modified, expires_at, size, extractor_version, extraction FROM entries WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+        return CachedResponse(
+            url=row[0], etag=row[1], last_modified=row[2], expires_at=row[3], size=row[4],
+            extractor_version=row[5], extraction=json.loads(row[6]) if row[6] else None,
+        )
+
+    def open_body(self, url: str) -> Optional[IO[bytes]]:
+        try:
+            return open(self._body_path(url), "rb")
+        except FileNotFoundError:
+            return None
+
+    def writer(self, url: str) -> BodyWriter:
+        return BodyWriter(self._body_path(url))
+
+    def store(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        body: Union[bytes, BodyWriter],
+        extraction: Optional[Dict[str, Any]],
+        extractor_version: Optional[str],
+    ) -> bool:
+        """
+        Store a 200 response, given as bytes or as a spooled `BodyWriter`.
+        Returns False if the response is not cacheable.
+        """
+        size = body.size if isinstance(body, BodyWriter) else len(body)
+        lifetime = freshness_lifetime(headers, self.default_ttl)
+        if lifetime is None or size > self.max_bytes:
+            if isinstance(body, BodyWriter):
+                body.abort()
+            self.delete(url)
+            return False
+
+        if not isinstance(body, BodyWriter):
+            writer = self.writer(url)
+            writer.write(body)
+            body = writer
+        body.commit()
+
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, headers.get("etag"), headers.get("last-modified"), now + lifetime, now, size,
+             extractor_version, json.dumps(extraction) if extraction is not None else None),
+        )
+        self._evict()
+        return True
+
+    def refresh(self, url: str, headers: Mapping[str, str]):
+        """Apply a 304 response: extend freshness and update validators if sent."""
+        lifetime = freshness_lifetime(headers, self.default_ttl) or 0
+        self._db.execute(
+            "UPDATE entries SET expires_at = ?, etag = COALESCE(?, etag),"
+            " last_modified = COALESCE(?, last_modified), last_access = ? WHERE url = ?",
+            (time.time() + lifetime, headers.get("etag"), headers.get("last-modified"), time.time(), url),
+        )
+
+    def update_extraction(self, url: str, extraction: Dict[str, Any], extractor_version: str):
+        self._db.execute(
+            "UPDATE entries SET extraction = ?, extractor_version = ? WHERE url = ?",
+            (json.dumps(extraction), extractor_version, url),
+        )
+
+    def delete(self, url: str):
+        self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+        try:
+            os.remove(self._body_path(url))
+        except FileNotFoundError:
+            pass
+
+    def total_size(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        excess = self.total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for url, size in self._db.execute("SELECT url, size FROM entries ORDER BY last_access"):
+            victims.append(url)
+            excess -= size
+            if excess <= 0:
+                break
+        for url in victims:
+            self.delete(url)
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the configured cache, or None if disabled."""
+    global _cache
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(
+            settings.HTTP_CACHE_PATH,
+            max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+            default_ttl=settings.HTTP_CACHE_DEFAULT_TTL,
+        )
+    return _cache
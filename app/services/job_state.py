@@ -0,0 +1,112 @@
+"""
+Job State Transitions.
+Every lifecycle change of a Job is a single conditional UPDATE:
+
+    UPDATE jobs SET status = :to, ... WHERE id = :id AND status IN (:allowed) RETURNING ...
+
+The database applies the check and the write atomically, so concurrent writers (a worker
+finishing while the API cancels) cannot overwrite each other: the loser's UPDATE matches
+no row and the transition is reported as rejected. One round trip per transition.
+"""
+import datetime
+from typing import Any, Dict, FrozenSet, Optional
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobStatus
+
+PENDING = JobStatus.PENDING.value
+RUNNING = JobStatus.RUNNING.value
+SUCCESS = JobStatus.SUCCESS.value
+FAILED = JobStatus.FAILED.value
+CANCELLED = JobStatus.CANCELLED.value
+
+# Target status -> statuses it may be entered from.
+# RUNNING -> RUNNING covers a task re-executed by a retry; FAILED may also be reached
+# from PENDING when a task fails before it could start.
+ALLOWED_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    RUNNING: frozenset({PENDING, RUNNING}),
+    SUCCESS: frozenset({RUNNING}),
+    FAILED: frozenset({PENDING, RUNNING}),
+    CANCELLED: frozenset({PENDING, RUNNING, SUCCESS, FAILED}),
+}
+
+
+# Payload fields returned with every transition (run time statistics, memoization)
+TASK_TYPE = Job.input_payload["task_type"].as_string().label("task_type")
+DURATION = Job.input_payload["duration"].as_integer().label("duration")
+INPUT_HASH = Job.input_payload["input_hash"].as_string().label("input_hash")
+
+RETURNED_COLUMNS = (
+    Job.id, Job.status, Job.retry_count, Job.created_at, Job.started_at, Job.completed_at,
+    TASK_TYPE, DURATION, INPUT_HASH,
+)
+
+
+class IllegalTransitionError(ValueError):
+    """The requested target status is not part of the job lifecycle."""
+
+
+def _values_for(target: str, values: Dict[str, Any]) -> Dict[Any, Any]:
+    now = datetime.datetime.utcnow()
+    columns: Dict[Any, Any] = {Job.status: target}
+    if target == RUNNING:
+        # Keep the first start time across retries
+        columns[Job.started_at] = func.coalesce(Job.started_at, now)
+    else:
+        columns[Job.completed_at] = now
+    for name, value in values.items():
+        columns[getattr(Job, name)] = value
+    return columns
+
+
+def transition_statement(job_id: str, target: str, **values):
+    """Conditional UPDATE for `job_id` -> `target`, with extra column `values`."""
+    if target not in ALLOWED_TRANSITIONS:
+        raise IllegalTransitionError(f"No transition into {target!r}")
+    return (
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(ALLOWED_TRANSITIONS[target]))
+        .values(_values_for(target, values))
+        .returning(*RETURNED_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def transition(db: Session, job_id: str, target: str, commit: bool = True, **values) -> Optional[Row]:
+    """
+    Apply a transition (and commit, unless `commit=False`). Returns the updated row
+    (`RETURNED_COLUMNS`), or None if the job does not exist or its current status
+    does not allow it.
+    """
+    row = db.execute(transition_statement(job_id, target, **values)).first()
+    if commit:
+        db.commit()
+    return row
+
+
+async def transition_async(db: AsyncSession, job_id: str, target: str, **values) -> Optional[Row]:
+    """Async counterpart of `transition` for the API."""
+    row = (await db.execute(transition_statement(job_id, target, **values))).first()
+    await db.commit()
+    return row
+
+
+def record_retry(db: Session, job_id: str) -> Optional[Row]:
+    """Increment retry_count in place (no read-modify-write), for active jobs only."""
+    row = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_((PENDING, RUNNING)))
+        .values(retry_count=Job.retry_count + 1)
+        .returning(Job.id, Job.status, Job.retry_count)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return row
+
+
+async def current_status_async(db: AsyncSession, job_id: str) -> Optional[str]:
+    """Status lookup used to explain a rejected transition (None if the job does not exist)."""
+    return (await db.execute(select(Job.status).where(Job.id == job_id))).scalar_one_or_none()
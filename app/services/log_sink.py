@@ -0,0 +1,114 @@
+"""
+Buffered Job Log Sink.
+Collects `JobLog` rows in memory and writes them as one multi-row INSERT per batch,
+instead of one session and commit per log message.
+
+A batch is flushed when it reaches `JOB_LOG_BATCH_SIZE` rows, when the oldest buffered
+row is older than `JOB_LOG_FLUSH_INTERVAL` seconds, and explicitly by the worker on task
+completion, failure, retry and process shutdown.
+"""
+import atexit
+import datetime
+import os
+import threading
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.events import publish_task_event, LOGS_WRITTEN
+from app.core.status_cache import invalidate_task_status
+from app.models.job import JobLog
+
+
+class JobLogSink:
+    """
+    Per-process, thread-safe buffer of job log rows.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def add(self, job_id: str, message: str, level: str = "INFO"):
+        row = {
+            "job_id": job_id,
+            "level": level,
+            "message": message,
+            # Capture the time of the event, not the time of the flush
+            "timestamp": datetime.datetime.utcnow(),
+        }
+        self._ensure_flusher()
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if rows:
+                self._write(rows)
+
+    def _write(self, rows: List[dict]):
+        self._insert(rows)
+        job_ids = {row["job_id"] for row in rows}
+        # New log lines change the job's status response, and wake log stream clients
+        invalidate_task_status(*job_ids)
+        for job_id in job_ids:
+            publish_task_event(job_id, LOGS_WRITTEN)
+
+    def _insert(self, rows: List[dict]):
+        try:
+            with SessionLocal() as db:
+                db.execute(insert(JobLog), rows)
+                db.commit()
+        except Exception as e:
+            # One bad row (e.g. unknown job_id) must not discard the rest of the batch.
+            print(f"Job log batch insert failed ({len(rows)} rows): {e}. Retrying row by row.")
+            for row in rows:
+                try:
+                    with SessionLocal() as db:
+                        db.execute(insert(JobLog), [row])
+                        db.commit()
+                except Exception as row_error:
+                    print(f"Dropping job log for {row['job_id']}: {row_error}")
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so (re)start the flusher in each worker child.
+        if self._pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+                return
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            self._flusher = threading.Thread(target=self._run, name="job-log-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while not self._wakeup.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the background flusher and write any remaining rows."""
+        self._wakeup.set()
+        self.flush()
+
+
+log_sink = JobLogSink(
+    batch_size=settings.JOB_LOG_BATCH_SIZE,
+    flush_interval=settings.JOB_LOG_FLUSH_INTERVAL,
+)
+
+atexit.register(log_sink.close)
@@ -0,0 +1,162 @@
+"""
+Task Result Memoization.
+Identical submissions share one job.
+
+Each task input gets a canonical content hash (task type + the fields that affect the
+result; large vectors are represented by their blob checksum). Redis maps
+`task-memo:<task_type>:<hash>` to the job computing that input:
+
+* while the job is PENDING/RUNNING, identical submissions attach to it (in-flight coalescing);
+* once it succeeds, the key is kept for the task type's TTL and submissions are answered
+  with the stored result;
+* if it fails or is cancelled, the key is dropped and the next submission runs again.
+
+`MEMO_TTL_SECONDS` sets the TTL per task type (0 disables memoization for that type);
+`invalidate` drops every memo entry of a type. Redis errors never fail a submission:
+the task then simply runs unmemoized.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_client import get_async_redis, get_sync_redis
+from app.schemas.job import TaskCreate, TaskType
+
+MEMO_KEY = "task-memo:{}:{}"
+
+# Input fields that determine the result, per task type
+RESULT_FIELDS = {
+    TaskType.VECTOR.value: ("vector_data", "dimension", "metadata"),
+    TaskType.SCRAPE.value: ("url",),
+    TaskType.SCRAPE_BATCH.value: ("urls",),
+}
+
+
+def ttl_for(task_type: Optional[str]) -> int:
+    """Result TTL of a task type in seconds; 0 = not memoized."""
+    return int(settings.MEMO_TTL_SECONDS.get(task_type, 0)) if task_type else 0
+
+
+def input_hash(payload: TaskCreate, vector_ref: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 over the canonical JSON (sorted keys, no whitespace) of the result-determining input."""
+    task_type = TaskType(payload.task_type).value
+    data = payload.model_dump(include=set(RESULT_FIELDS[task_type]))
+    if vector_ref is not None:
+        # Claim-checked vectors: the blob checksum stands for the data
+        data["vector_data"] = {"sha256": vector_ref["sha256"], "shape": vector_ref.get("shape")}
+    canonical = json.dumps({"task_type": task_type, **data}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def memo_key(task_type: str, digest: str) -> str:
+    return MEMO_KEY.format(task_type, digest)
+
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def claim(task_type: str, digest: str, job_id: str) -> Optional[str]:
+    """
+    Register `job_id` as the job computing `digest` (SET NX, bounded by MEMO_INFLIGHT_TTL).
+    Returns None if it was registered, otherwise the id of the job already registered.
+    """
+    key = memo_key(task_type, digest)
+    client = get_async_redis()
+    try:
+        for _ in range(2):
+            if await client.set(key, job_id, nx=True, ex=settings.MEMO_INFLIGHT_TTL):
+                return None
+            existing = _decode(await client.get(key))
+            if existing is not None:
+                return existing
+            # Expired between SET and GET: try again
+    except redis.RedisError as e:
+        print(f"Memo claim failed for {key}: {e}")
+    return None
+
+
+async def claim_age(task_type: str, digest: str) -> Optional[float]:
+    """
+    Seconds since the in-flight entry was (re)claimed, from its remaining TTL; None if
+    unknown (no entry, already kept for a finished job, or Redis unavailable).
+    """
+    key = memo_key(task_type, digest)
+    try:
+        remaining = await get_async_redis().pttl(key)
+    except redis.RedisError as e:
+        print(f"Memo lookup failed for {key}: {e}")
+        return None
+    if remaining is None or remaining < 0:
+        return None
+    return max(0.0, settings.MEMO_INFLIGHT_TTL - remaining / 1000)
+
+
+async def replace(task_type: str, digest: str, stale_job_id: str, job_id: str) -> bool:
+    """
+    Point the entry at `job_id` if it still names `stale_job_id` (a failed, cancelled or
+    expired job). Returns False if another submission took it over first.
+    """
+    key = memo_key(task_type, digest)
+    client = get_async_redis()
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            if _decode(await pipe.get(key)) not in (stale_job_id, None):
+                await pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.set(key, job_id, ex=settings.MEMO_INFLIGHT_TTL)
+            await pipe.execute()
+        return True
+    except redis.WatchError:
+        return False
+    except redis.RedisError as e:
+        print(f"Memo update failed for {key}: {e}")
+        return True
+
+
+async def release_async(task_type: Optional[str], digest: Optional[str], job_id: str):
+    """Drop the entry if it still points to `job_id` (API side: cancelled or never dispatched)."""
+    if not task_type or not digest:
+        return
+    key = memo_key(task_type, digest)
+    try:
+        client = get_async_redis()
+        if _decode(await client.get(key)) == job_id:
+            await client.delete(key)
+    except redis.RedisError as e:
+        print(f"Memo release failed for {key}: {e}")
+
+
+def job_finished(task_type: Optional[str], digest: Optional[str], job_id: str, succeeded: bool):
+    """
+    Worker side: keep the entry of a successful job for its type's TTL, drop a failed one.
+    Only touches the entry while it still belongs to this job.
+    """
+    if not task_type or not digest:
+        return
+    key = memo_key(task_type, digest)
+    try:
+        client = get_sync_redis()
+        if _decode(client.get(key)) != job_id:
+            return
+        ttl = ttl_for(task_type)
+        if succeeded and ttl > 0:
+            client.expire(key, ttl)
+        else:
+            client.delete(key)
+    except redis.RedisError as e:
+        print(f"Memo update failed for {key}: {e}")
+
+
+async def invalidate(task_type: str) -> int:
+    """Drop all memo entries of a task type. Returns the number of entries removed."""
+    client = get_async_redis()
+    removed = 0
+    async for key in client.scan_iter(match=MEMO_KEY.format(task_type, "*"), count=500):
+        removed += await client.delete(key)
+    return removed
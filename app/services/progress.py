@@ -0,0 +1,123 @@
+"""
+Task Progress Reporter.
+Structured, throttled progress updates for long-running tasks.
+
+Tasks call `advance()` as often as they like (per item, per chunk); the reporter
+coalesces the calls and publishes at most `max_rate` updates per second, so a job over
+millions of items does not turn into millions of result-backend writes. A phase change
+is published immediately. Each update carries the phase, done/total, the throughput
+over a sliding window and the ETA derived from it.
+"""
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+Publisher = Callable[[Dict[str, Any]], None]
+
+
+class ProgressReporter:
+    """
+    Progress state for one task run. `publish(meta)` receives the progress dict, e.g.
+    `lambda meta: task.update_state(state='PROGRESS', meta=meta)`.
+    Updates are only sent from `advance`/`set_phase`/`flush` calls (no background timer);
+    call `flush()` at the end of a phase if the last state must be visible.
+    """
+
+    def __init__(
+        self,
+        publish: Publisher,
+        job_id: str,
+        phase: str = "starting",
+        total: Optional[int] = None,
+        max_rate: Optional[float] = None,
+        rate_window: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.publish = publish
+        self.job_id = job_id
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self.message: Optional[str] = None
+        max_rate = settings.PROGRESS_MAX_UPDATES_PER_SECOND if max_rate is None else max_rate
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.rate_window = settings.PROGRESS_RATE_WINDOW if rate_window is None else rate_window
+        self.clock = clock
+        self.started_at = clock()
+        self.published = 0
+        self._last_publish: Optional[float] = None
+        self._dirty = False
+        # (time, done) samples, one per publish, covering the last `rate_window` seconds
+        self._samples: Deque[Tuple[float, int]] = deque()
+
+    def set_phase(self, phase: str, total: Optional[int] = None, message: Optional[str] = None):
+        """Start a new phase (resets the counter and the throughput window) and publish now."""
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self.message = message
+        self._samples.clear()
+        self.flush()
+
+    def advance(self, n: int = 1, message: Optional[str] = None):
+        """Record `n` more items done; publishes only if the rate limit allows."""
+        self.update(self.done + n, message)
+
+    def update(self, done: int, message: Optional[str] = None):
+        self.done = done
+        if message is not None:
+            self.message = message
+        self._dirty = True
+        now = self.clock()
+        if self._last_publish is None or now - self._last_publish >= self.min_interval:
+            self._publish(now)
+
+    def flush(self):
+        """Publish the current state regardless of the rate limit."""
+        self._publish(self.clock())
+
+    def flush_pending(self):
+        """Publish only if there are updates that have not been sent yet."""
+        if self._dirty:
+            self.flush()
+
+    def rate(self) -> Optional[float]:
+        """Items per second over the sliding window (None until two samples exist)."""
+        if len(self._samples) < 2:
+            return None
+        (t0, d0), (t1, d1) = self._samples[0], self._samples[-1]
+        if t1 <= t0:
+            return None
+        return (d1 - d0) / (t1 - t0)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = self.clock() if now is None else now
+        rate = self.rate()
+        meta: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "phase": self.phase,
+            "done": self.done,
+            "total": self.total,
+            "message": self.message or self.phase,
+            "elapsed_seconds": round(now - self.started_at, 3),
+            "rate_per_second": round(rate, 3) if rate is not None else None,
+            "eta_seconds": None,
+        }
+        if self.total:
+            # `current` kept for clients that render current/total as a percentage
+            meta["current"] = self.done
+            meta["percent"] = round(100.0 * self.done / self.total, 2)
+            if rate:
+                meta["eta_seconds"] = round(max(0, self.total - self.done) / rate, 1)
+        return meta
+
+    def _publish(self, now: float):
+        self._samples.append((now, self.done))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.rate_window:
+            self._samples.popleft()
+        self._last_publish = now
+        self._dirty = False
+        self.published += 1
+        self.publish(self.snapshot(now))
@@ -0,0 +1,267 @@
+"""
+Data Retention.
+Removes expired jobs and job logs without long locks or WAL bursts.
+
+* Partitioned tables (see app.core.partitions): whole partitions past their retention
+  are dropped, one short transaction each; a jobs partition only once every row in it
+  has expired.
+* Everything else is deleted in bounded batches in keyset order, one transaction per
+  batch, with a pause in between (`RETENTION_BATCH_SIZE`, `RETENTION_BATCH_PAUSE`).
+
+Jobs are kept `RETENTION_DAYS[status]` days after completion; PENDING/RUNNING jobs and
+statuses without a policy are never deleted. Logs are kept `JOB_LOG_RETENTION_DAYS`.
+Claim-check blobs of deleted jobs are deleted with them once no remaining job references
+the same (content-addressed) blob.
+"""
+import datetime
+import time
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+from sqlalchemy import and_, column, delete, exists, func, or_, select, table, text, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, sync_engine
+from app.core.partitions import enabled_tables, ensure_partitions, is_partitioned, list_partitions
+from app.core.status_cache import invalidate_task_status
+from app.models.job import Job, JobLog, JobStatus
+from app.services.blob_store import BlobRef, get_blob_store
+
+NEVER_DELETED = {JobStatus.PENDING.value, JobStatus.RUNNING.value}
+
+# Give up on a partition drop (retried next run) rather than queue behind long queries
+DROP_LOCK_TIMEOUT = "5s"
+
+# Blob a job references; `vector_ref` alone for rows written before `blob_key`
+BLOB_KEY = func.coalesce(
+    Job.input_payload["blob_key"].as_string(),
+    Job.input_payload[("vector_ref", "key")].as_string(),
+)
+
+
+def job_cutoffs(now: datetime.datetime) -> Dict[str, datetime.datetime]:
+    """Status -> completion time before which a job of that status has expired."""
+    return {
+        status: now - datetime.timedelta(days=days)
+        for status, days in settings.RETENTION_DAYS.items()
+        if status not in NEVER_DELETED
+    }
+
+
+def _pause(sleep: Callable[[float], None], batches: int) -> bool:
+    """Throttle between batches; False once RETENTION_MAX_BATCHES is reached."""
+    if settings.RETENTION_MAX_BATCHES and batches >= settings.RETENTION_MAX_BATCHES:
+        return False
+    sleep(settings.RETENTION_BATCH_PAUSE)
+    return True
+
+
+def delete_unreferenced_blobs(
+    db: Session, keys: Iterable[str], dry_run: bool = False, exclude_ids: Iterable[str] = (),
+) -> int:
+    """
+    Delete the blobs among `keys` that no job (other than `exclude_ids`) references and
+    that were not stored again within BLOB_GC_GRACE_SECONDS. Call after the referencing
+    jobs are deleted.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    query = select(BLOB_KEY).where(BLOB_KEY.in_(keys)).distinct()
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query = query.where(Job.id.notin_(exclude_ids))
+    orphaned = keys - set(db.execute(query).scalars())
+    if dry_run:
+        return len(orphaned)
+    store = get_blob_store()
+    older_than = time.time() - settings.BLOB_GC_GRACE_SECONDS
+    deleted = 0
+    for key in sorted(orphaned):
+        try:
+            if store.delete(BlobRef(key=key, sha256=key, size=0, backend=store.backend), older_than=older_than):
+                deleted += 1
+        except OSError as e:
+            print(f"Could not delete blob {key} (retrying with its next job): {e}")
+    return deleted
+
+
+def delete_expired_jobs(
+    db: Session, status: str, cutoff: datetime.datetime, dry_run: bool = False, sleep=time.sleep,
+    blobs: Dict[str, int] = None,
+) -> int:
+    """
+    Delete jobs of `status` completed before `cutoff` (and their logs), batch by batch.
+    Blobs released by each batch are counted in `blobs["deleted"]`.
+    """
+    deleted = batches = 0
+    last = None
+    while True:
+        query = (
+            select(Job.id, Job.completed_at, BLOB_KEY.label("blob_key"))
+            .where(Job.status == status, Job.completed_at < cutoff)
+            .order_by(Job.completed_at, Job.id)
+            .limit(settings.RETENTION_BATCH_SIZE)
+        )
+        if last is not None:
+            query = query.where(tuple_(Job.completed_at, Job.id) > last)
+        rows = db.execute(query).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        if not dry_run:
+            db.execute(delete(JobLog).where(JobLog.job_id.in_(ids)))
+            # Re-check the status: a job may have been cancelled since it was read
+            db.execute(delete(Job).where(Job.id.in_(ids), Job.status == status))
+            db.commit()
+            invalidate_task_status(*ids)
+        keys = {row.blob_key for row in rows if row.blob_key}
+        if keys:
+            # A dry run deleted nothing: do not count this batch as remaining references
+            released = delete_unreferenced_blobs(db, keys, dry_run, exclude_ids=ids if dry_run else ())
+            if blobs is not None:
+                blobs["deleted"] = blobs.get("deleted", 0) + released
+        deleted += len(ids)
+        batches += 1
+        last = (rows[-1].completed_at, rows[-1].id)
+        if len(rows) < settings.RETENTION_BATCH_SIZE or not _pause(sleep, batches):
+            break
+    return deleted
+
+
+def delete_expired_logs(db: Session, cutoff: datetime.datetime, dry_run: bool = False, sleep=time.sleep) -> int:
+    """
+    Delete log rows older than `cutoff` from an unpartitioned job_logs table. Walks the
+    primary key from the oldest row and stops at the first row inside the retention
+    window (ids grow with time), so each batch is an index range read.
+    """
+    deleted = batches = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(JobLog.id, JobLog.timestamp)
+            .where(JobLog.id > last_id)
+            .order_by(JobLog.id)
+            .limit(settings.RETENTION_BATCH_SIZE)
+        ).all()
+        expired = [row.id for row in rows if row.timestamp is None or row.timestamp < cutoff]
+        if expired and not dry_run:
+            db.execute(delete(JobLog).where(JobLog.id.in_(expired)))
+            db.commit()
+        deleted += len(expired)
+        batches += 1
+        if not rows or len(expired) < len(rows) or len(rows) < settings.RETENTION_BATCH_SIZE:
+            break
+        last_id = rows[-1].id
+        if not _pause(sleep, batches):
+            break
+    return deleted
+
+
+def _jobs_partition_expired(conn, name: str, cutoffs: Dict[str, datetime.datetime]) -> bool:
+    """True if every job in partition `name` has expired under its status policy."""
+    if not cutoffs:
+        return False
+    partition = table(name, column("status"), column("completed_at"))
+    expired = or_(*(
+        and_(partition.c.status == status, partition.c.completed_at < cutoff)
+        for status, cutoff in cutoffs.items()
+    ))
+    return not conn.execute(select(exists().where(~expired).select_from(partition))).scalar()
+
+
+def _partition_blob_keys(conn, name: str) -> Set[str]:
+    """Blob keys referenced by the jobs in partition `name` (PostgreSQL)."""
+    return set(conn.execute(text(
+        f"SELECT DISTINCT coalesce(input_payload->>'blob_key', input_payload->'vector_ref'->>'key') "
+        f'FROM "{name}" WHERE input_payload IS NOT NULL'
+    )).scalars()) - {None}
+
+
+def _drop_partition(conn, parent: str, name: str):
+    conn.execute(text(f"SET LOCAL lock_timeout = '{DROP_LOCK_TIMEOUT}'"))
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    print(f"Dropped partition {name} of {parent}")
+
+
+def drop_expired_partitions(
+    parent: str, now: datetime.datetime, dry_run: bool = False, blobs: Dict[str, int] = None,
+) -> List[str]:
+    """
+    Drop the partitions of `parent` whose whole range is past retention. Blobs released
+    by dropped jobs partitions are counted in `blobs["deleted"]`.
+    """
+    if parent == "job_logs":
+        cutoff = now - datetime.timedelta(days=settings.JOB_LOG_RETENTION_DAYS)
+    else:
+        cutoffs = job_cutoffs(now)
+        if not cutoffs:
+            return []
+        # Rows are placed by created_at; none can have completed before it
+        cutoff = max(cutoffs.values())
+
+    with sync_engine.connect() as conn:
+        candidates = [p for p in list_partitions(conn, parent) if p.end <= cutoff]
+    dropped = []
+    for partition in candidates:
+        keys: Set[str] = set()
+        try:
+            with sync_engine.begin() as conn:
+                if parent == "jobs":
+                    if not _jobs_partition_expired(conn, partition.name, job_cutoffs(now)):
+                        continue
+                    keys = _partition_blob_keys(conn, partition.name)
+                    if not dry_run:
+                        ids = conn.execute(text(f'SELECT id FROM "{partition.name}"')).scalars()
+                        for chunk in ids.partitions(settings.RETENTION_BATCH_SIZE):
+                            invalidate_task_status(*chunk)
+                if not dry_run:
+                    _drop_partition(conn, parent, partition.name)
+            dropped.append(partition.name)
+        except OperationalError as e:
+            print(f"Could not drop partition {partition.name} (retrying next run): {e}")
+            continue
+        if keys and not dry_run:
+            with SessionLocal() as db:
+                released = delete_unreferenced_blobs(db, keys)
+            if blobs is not None:
+                blobs["deleted"] = blobs.get("deleted", 0) + released
+    return dropped
+
+
+def run_retention(now: datetime.datetime = None, dry_run: bool = False, sleep=time.sleep) -> Dict[str, Any]:
+    """
+    One retention pass: create upcoming partitions, drop expired ones, then batch-delete
+    what is left over. With `dry_run`, reports what would be removed without changes.
+    """
+    now = now or datetime.datetime.utcnow()
+    report: Dict[str, Any] = {
+        "dry_run": dry_run,
+        "partitions_created": [],
+        "partitions_dropped": [],
+        "jobs_deleted": {},
+        "logs_deleted": 0,
+        "blobs_deleted": 0,
+    }
+    blobs = {"deleted": 0}
+
+    partitioned = set()
+    if sync_engine.dialect.name == "postgresql":
+        with sync_engine.begin() as conn:
+            for name in enabled_tables():
+                if is_partitioned(conn, name):
+                    partitioned.add(name)
+                    if not dry_run:
+                        report["partitions_created"] += ensure_partitions(conn, name, now)
+        for name in sorted(partitioned):
+            report["partitions_dropped"] += drop_expired_partitions(name, now, dry_run, blobs)
+
+    with SessionLocal() as db:
+        for status, cutoff in job_cutoffs(now).items():
+            report["jobs_deleted"][status] = delete_expired_jobs(db, status, cutoff, dry_run, sleep, blobs)
+        if "job_logs" not in partitioned:
+            log_cutoff = now - datetime.timedelta(days=settings.JOB_LOG_RETENTION_DAYS)
+            report["logs_deleted"] = delete_expired_logs(db, log_cutoff, dry_run, sleep)
+    report["blobs_deleted"] = blobs["deleted"]
+    return report
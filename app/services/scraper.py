@@ -0,0 +1,225 @@
+"""
+Web Scraper Service.
+Page metadata extraction and the concurrent batch crawler used by the scrape tasks.
+
+Pages are parsed by the streaming extractor while they download (no document tree).
+The crawler runs on one asyncio event loop inside a worker process and shares a pooled
+`httpx.AsyncClient` (keep-alive connections) across all URLs. Concurrency is bounded
+globally and per host, so a batch can fetch many sites in parallel without hammering any
+single one.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from app.services.html_extractor import StreamingExtractor, extract
+from app.services.http_cache import CachedResponse, ResponseCache
+
+# Bump when extraction output changes, so cached extractions are recomputed from cached bodies
+EXTRACTOR_VERSION = "stream-1"
+
+READ_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def extract_page_metadata(url: str, content: Union[bytes, Iterable[bytes]], content_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract title, description and tag statistics from an HTML document (whole or in chunks).
+    """
+    return extract(url, content, content_type)
+
+
+class PageReader:
+    """
+    Consumes a 200 response body in one pass: each chunk goes to the streaming extractor
+    and, with a cache, to the cache spool. The body is never held in memory as a whole.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Mapping[str, str], cache: Optional[ResponseCache] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.cache = cache
+        self.extractor = StreamingExtractor(url, headers.get("content-type"))
+        self.spool = cache.writer(url) if cache is not None else None
+
+    def feed(self, chunk: bytes):
+        self.extractor.feed(chunk)
+        if self.spool is not None:
+            if self.spool.size + len(chunk) > self.cache.max_bytes:
+                # Too large to cache; stop spooling but keep extracting
+                self.spool.abort()
+                self.spool = None
+            else:
+                self.spool.write(chunk)
+
+    def finish(self) -> Dict[str, Any]:
+        extraction = self.extractor.close()
+        if self.cache is not None:
+            if self.spool is None:
+                self.cache.delete(self.url)
+            else:
+                self.cache.store(self.url, self.headers, self.spool, extraction, EXTRACTOR_VERSION)
+        return {**extraction, "status_code": self.status_code, "cache": "miss"}
+
+    def abort(self):
+        if self.spool is not None:
+            self.spool.abort()
+
+
+def cached_extraction(cache: ResponseCache, entry: CachedResponse) -> Optional[Dict[str, Any]]:
+    """Extraction for a cached page, re-extracting from the stored body if the extractor changed."""
+    if entry.extraction is not None and entry.extractor_version == EXTRACTOR_VERSION:
+        return entry.extraction
+    body = cache.open_body(entry.url)
+    if body is None:
+        return None
+    with body:
+        extraction = extract_page_metadata(entry.url, iter(partial(body.read, READ_CHUNK_SIZE), b""))
+    cache.update_extraction(entry.url, extraction, EXTRACTOR_VERSION)
+    return extraction
+
+
+def lookup_cached(cache: Optional[ResponseCache], url: str):
+    """
+    Return (entry, fresh_result). `fresh_result` is set when the entry can be used without
+    any network request; otherwise send `entry.conditional_headers()` with the GET.
+    """
+    if cache is None:
+        return None, None
+    entry = cache.get(url)
+    if entry is None:
+        return None, None
+    if entry.is_fresh:
+        extraction = cached_extraction(cache, entry)
+        if extraction is not None:
+            return entry, {**extraction, "status_code": 200, "cache": "fresh"}
+    return entry, None
+
+
+def revalidated(cache: ResponseCache, entry: CachedResponse, url: str, headers: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Apply a 304 Not Modified to the cache and return the cached extraction.
+    Returns None if the cached copy is gone; the caller should repeat the request without validators.
+    """
+    cache.refresh(url, headers)
+    extraction = cached_extraction(cache, entry)
+    if extraction is None:
+        cache.delete(url)
+        return None
+    return {**extraction, "status_code": 304, "cache": "revalidated"}
+
+
+def fetch_page(
+    url: str,
+    cache: Optional[ResponseCache] = None,
+    entry: Optional[CachedResponse] = None,
+    timeout: float = 10.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Blocking fetch + extract (used by `scrape_website`). Sends a conditional GET for a cached
+    `entry`; returns None if a 304 could not be served from the cache.
+    """
+    headers = {**DEFAULT_HEADERS, **(entry.conditional_headers() if entry else {})}
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and entry is not None:
+            return revalidated(cache, entry, url, response.headers)
+        response.raise_for_status()
+        reader = PageReader(url, response.status_code, response.headers, cache)
+        try:
+            for chunk in response.iter_content(READ_CHUNK_SIZE):
+                reader.feed(chunk)
+        except BaseException:
+            reader.abort()
+            raise
+        return reader.finish()
+
+
+async def fetch_page_async(
+    client: httpx.AsyncClient,
+    url: str,
+    cache: Optional[ResponseCache] = None,
+    entry: Optional[CachedResponse] = None,
+) -> Optional[Dict[str, Any]]:
+    """Async counterpart of `fetch_page` on a shared client (used by `crawl`)."""
+    headers = entry.conditional_headers() if entry else None
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 304 and entry is not None:
+            return revalidated(cache, entry, url, response.headers)
+        response.raise_for_status()
+        reader = PageReader(url, response.status_code, response.headers, cache)
+        try:
+            async for chunk in response.aiter_bytes(READ_CHUNK_SIZE):
+                reader.feed(chunk)
+        except BaseException:
+            reader.abort()
+            raise
+        return reader.finish()
+
+
+ResultCallback = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+
+async def crawl(
+    urls: List[str],
+    on_result: Optional[ResultCallback] = None,
+    concurrency: int = 20,
+    per_host: int = 4,
+    timeout: float = 10.0,
+    client: Optional[httpx.AsyncClient] = None,
+    cache: Optional[ResponseCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch and extract all `urls` concurrently. Never raises for a single URL: each
+    result has `ok` and either the extracted fields or an `error`.
+    With a `cache`, fresh pages are served without a request and stale ones are revalidated.
+    Results are returned in input order; `on_result(index, result)` is awaited as each
+    URL completes, in completion order.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+    global_slots = asyncio.Semaphore(concurrency)
+    host_slots: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    owns_client = client is None
+    if owns_client:
+        client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def fetch_one(index: int, url: str):
+        started = time.perf_counter()
+        host = urlsplit(url).netloc
+        # Take the host slot first so a busy host does not hold global slots while waiting
+        async with host_slots[host], global_slots:
+            try:
+                entry, result = lookup_cached(cache, url)
+                if result is None:
+                    result = await fetch_page_async(client, url, cache, entry)
+                if result is None:
+                    result = await fetch_page_async(client, url, cache)
+                result = {"ok": True, **result}
+            except Exception as e:
+                result = {"ok": False, "url": url, "error": f"{type(e).__name__}: {e}"}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        results[index] = result
+        if on_result is not None:
+            await on_result(index, result)
+
+    try:
+        await asyncio.gather(*(fetch_one(i, url) for i, url in enumerate(urls)))
+    finally:
+        if owns_client:
+            await client.aclose()
+    return results
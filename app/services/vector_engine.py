@@ -0,0 +1,138 @@
+"""
+Vector Chunk Engine.
+Vectorized (NumPy) processing of embedding batches for `process_vector_data`.
+
+The input is converted once into a contiguous float32 matrix of shape (n, dim) and
+processed in fixed-size row chunks. Every operation on a chunk is a whole-array NumPy
+call (no Python loop over vectors), and chunks are views into the matrix, so the
+work per chunk is bounded by memory bandwidth.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+class VectorShapeError(ValueError):
+    """The input cannot be interpreted as a (n, dim) matrix. Not retryable."""
+
+
+def to_matrix(vector_data: ArrayLike, dimension: Optional[int] = None) -> np.ndarray:
+    """
+    Convert the input into a C-contiguous float32 matrix of shape (n, dimension).
+    A flat input without `dimension` is treated as a single vector.
+    """
+    array = np.asarray(vector_data, dtype=np.float32)
+    if array.ndim == 2:
+        if dimension is not None and array.shape[1] != dimension:
+            raise VectorShapeError(f"Expected dimension {dimension}, got {array.shape[1]}")
+        return np.ascontiguousarray(array)
+    if array.ndim != 1:
+        raise VectorShapeError(f"Expected a flat or 2-D input, got {array.ndim} dimensions")
+    if array.size == 0:
+        raise VectorShapeError("vector_data is empty")
+
+    dimension = dimension or array.size
+    if dimension <= 0 or array.size % dimension:
+        raise VectorShapeError(f"{array.size} values cannot be split into vectors of dimension {dimension}")
+    return np.ascontiguousarray(array.reshape(-1, dimension))
+
+
+def iter_chunks(matrix: np.ndarray, chunk_size: int) -> Iterator[np.ndarray]:
+    """Yield row-chunk views (no copies)."""
+    for start in range(0, matrix.shape[0], chunk_size):
+        yield matrix[start:start + chunk_size]
+
+
+@dataclass
+class VectorStats:
+    """
+    Running statistics merged across chunks.
+    """
+    dimension: int
+    count: int = 0
+    zero_vectors: int = 0
+    non_finite_vectors: int = 0
+    norm_sum: float = 0.0
+    norm_min: float = float("inf")
+    norm_max: float = 0.0
+    component_sum: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.component_sum is None:
+            self.component_sum = np.zeros(self.dimension, dtype=np.float64)
+
+    def to_dict(self) -> Dict[str, object]:
+        valid = self.count - self.non_finite_vectors
+        return {
+            "count": self.count,
+            "dimension": self.dimension,
+            "zero_vectors": self.zero_vectors,
+            "non_finite_vectors": self.non_finite_vectors,
+            "norm_mean": self.norm_sum / valid if valid else 0.0,
+            "norm_min": self.norm_min if valid else 0.0,
+            "norm_max": self.norm_max,
+            # Mean of the normalized vectors; its length measures how clustered the batch is
+            "centroid_norm": float(np.linalg.norm(self.component_sum / valid)) if valid else 0.0,
+        }
+
+
+def process_chunk(chunk: np.ndarray, stats: VectorStats) -> np.ndarray:
+    """
+    Validate, L2-normalize (in place) and accumulate statistics for one chunk.
+    Rows that are all zeros or contain NaN/Inf are left unnormalized and zeroed.
+    """
+    # Row norms via a fused multiply-add over the rows; avoids the temporary of chunk ** 2.
+    # NaN/Inf propagate into the norm, so the full-chunk isfinite pass is only needed
+    # for the (rare) rows whose norm is not finite.
+    norms = np.sqrt(np.einsum("ij,ij->i", chunk, chunk))
+    finite = np.isfinite(norms)
+    non_finite = int(chunk.shape[0] - np.count_nonzero(finite))
+    if non_finite:
+        suspect = np.flatnonzero(~finite)
+        # Finite values can still overflow float32 when squared: recompute those in float64
+        rows = chunk[suspect].astype(np.float64)
+        finite[suspect] = np.isfinite(rows).all(axis=1)
+        norms[suspect] = np.where(finite[suspect], np.linalg.norm(rows, axis=1), 0.0)
+        non_finite = int(chunk.shape[0] - np.count_nonzero(finite))
+        chunk[~finite] = 0.0
+        norms[~finite] = 0.0
+
+    nonzero = norms > 0
+    zero = int(chunk.shape[0] - np.count_nonzero(nonzero)) - non_finite
+
+    safe_norms = np.where(nonzero, norms, 1.0).astype(np.float32, copy=False)
+    chunk /= safe_norms[:, None]
+
+    stats.count += chunk.shape[0]
+    stats.non_finite_vectors += non_finite
+    stats.zero_vectors += zero
+    valid_norms = norms[finite]
+    if valid_norms.size:
+        stats.norm_sum += float(valid_norms.sum(dtype=np.float64))
+        stats.norm_min = min(stats.norm_min, float(valid_norms.min()))
+        stats.norm_max = max(stats.norm_max, float(valid_norms.max()))
+    stats.component_sum += chunk.sum(axis=0, dtype=np.float64)
+    return chunk
+
+
+def process_matrix(
+    matrix: np.ndarray,
+    chunk_size: int,
+    on_chunk: Optional[Callable[[int, int, np.ndarray], None]] = None,
+) -> VectorStats:
+    """
+    Run `process_chunk` over the whole matrix.
+    `on_chunk(index, total_chunks, normalized_chunk)` is called after each chunk, e.g.
+    to report progress or hand the chunk to a vector store.
+    """
+    chunk_size = max(1, chunk_size)
+    total_chunks = max(1, -(-matrix.shape[0] // chunk_size))
+    stats = VectorStats(dimension=matrix.shape[1])
+    for index, chunk in enumerate(iter_chunks(matrix, chunk_size)):
+        process_chunk(chunk, stats)
+        if on_chunk is not None:
+            on_chunk(index, total_chunks, chunk)
+    return stats
@@ -0,0 +1,147 @@
+"""
+Binary Vector Upload.
+Streams a raw float32 or `.npy` request body into the blob store chunk by chunk.
+
+Only the dtype and the shape are validated (from the `.npy` header or the declared
+dimension and byte count); values are never parsed, and memory use per upload is bounded
+by the size of one network chunk.
+"""
+import ast
+import asyncio
+import struct
+from typing import AsyncIterator, Optional, Tuple
+
+import numpy as np
+
+from app.services.blob_store import BlobRef, BlobStore
+
+NPY_MAGIC = b"\x93NUMPY"
+FLOAT32 = np.dtype("<f4")
+
+
+class UploadValidationError(ValueError):
+    """The body is not a float32 array of the declared shape."""
+
+
+class UploadTooLargeError(ValueError):
+    """The body exceeds the configured upload limit."""
+
+
+def parse_npy_header(prefix: bytes) -> Optional[Tuple[np.dtype, bool, Tuple[int, ...], int]]:
+    """
+    Parse a `.npy` header from the first bytes of a body.
+    Returns (dtype, fortran_order, shape, data_offset), or None if more bytes are needed.
+    """
+    if len(prefix) < 10:
+        return None
+    if not prefix.startswith(NPY_MAGIC):
+        raise UploadValidationError("Not a .npy file")
+    major = prefix[6]
+    if major == 1:
+        (header_len,) = struct.unpack("<H", prefix[8:10])
+        start = 10
+    elif major in (2, 3):
+        if len(prefix) < 12:
+            return None
+        (header_len,) = struct.unpack("<I", prefix[8:12])
+        start = 12
+    else:
+        raise UploadValidationError(f"Unsupported .npy version {major}")
+    if len(prefix) < start + header_len:
+        return None
+
+    try:
+        header = ast.literal_eval(prefix[start:start + header_len].decode("latin1"))
+        dtype = np.dtype(header["descr"])
+        return dtype, bool(header["fortran_order"]), tuple(header["shape"]), start + header_len
+    except (ValueError, SyntaxError, KeyError, TypeError) as e:
+        raise UploadValidationError(f"Invalid .npy header: {e}")
+
+
+def _check_shape(size: int, dimension: Optional[int], rows: Optional[int]) -> Tuple[int, int]:
+    """Validate a raw float32 body size against the declared shape; returns (rows, dimension)."""
+    if not dimension:
+        raise UploadValidationError("dimension is required for raw float32 uploads")
+    row_bytes = dimension * FLOAT32.itemsize
+    if size == 0 or size % row_bytes:
+        raise UploadValidationError(f"{size} bytes is not a whole number of float32 vectors of dimension {dimension}")
+    actual_rows = size // row_bytes
+    if rows is not None and rows != actual_rows:
+        raise UploadValidationError(f"Declared {rows} rows but received {actual_rows}")
+    return actual_rows, dimension
+
+
+async def ingest_vector_stream(
+    stream: AsyncIterator[bytes],
+    store: BlobStore,
+    dimension: Optional[int] = None,
+    rows: Optional[int] = None,
+    max_bytes: int = 0,
+) -> BlobRef:
+    """
+    Write a raw float32 or `.npy` body to `store` and return the array reference.
+    The format is detected from the `.npy` magic bytes.
+    Disk writes run in a thread so the event loop keeps serving other requests.
+    """
+    writer = await asyncio.to_thread(store.writer)
+    prefix = b""
+    npy_shape: Optional[Tuple[int, ...]] = None
+    is_npy: Optional[bool] = None
+    try:
+        async for chunk in stream:
+            if not chunk:
+                continue
+            if is_npy is None or (is_npy and npy_shape is None):
+                # Buffer only until the format (and .npy header) is known
+                prefix += chunk
+                if is_npy is None:
+                    if len(prefix) < len(NPY_MAGIC):
+                        continue
+                    is_npy = prefix.startswith(NPY_MAGIC)
+                if is_npy:
+                    header = parse_npy_header(prefix)
+                    if header is None:
+                        continue
+                    dtype, fortran_order, npy_shape, offset = header
+                    if dtype != FLOAT32:
+                        raise UploadValidationError(f"Expected little-endian float32, got {dtype.str}")
+                    if fortran_order:
+                        raise UploadValidationError("Fortran-ordered arrays are not supported")
+                    chunk = prefix[offset:]
+                else:
+                    chunk = prefix
+                prefix = b""
+
+            if max_bytes and writer.size + len(chunk) > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            await asyncio.to_thread(writer.write, chunk)
+
+        if is_npy is None:
+            # Body shorter than the magic: treat as raw
+            if prefix:
+                await asyncio.to_thread(writer.write, prefix)
+            is_npy = False
+
+        if is_npy:
+            if npy_shape is None:
+                raise UploadValidationError("Truncated .npy header")
+            if len(npy_shape) == 1:
+                npy_shape = (1, npy_shape[0]) if not dimension else (npy_shape[0] // dimension, dimension)
+            if len(npy_shape) != 2:
+                raise UploadValidationError(f"Expected a 1-D or 2-D array, got shape {npy_shape}")
+            if dimension and npy_shape[1] != dimension:
+                raise UploadValidationError(f"Declared dimension {dimension}, array has {npy_shape[1]}")
+            expected = int(np.prod(npy_shape)) * FLOAT32.itemsize
+            if writer.size != expected:
+                raise UploadValidationError(f"Header declares {expected} data bytes, received {writer.size}")
+            shape = _check_shape(writer.size, dimension or npy_shape[1], rows)
+        else:
+            shape = _check_shape(writer.size, dimension, rows)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+
+    ref = await asyncio.to_thread(writer.commit)
+    ref.dtype = FLOAT32.str
+    ref.shape = list(shape)
+    return ref
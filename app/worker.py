@@ -6,25 +6,47 @@ Implements:
 2. Resiliency Patterns (Circuit Breaker, Retries)
 3. Observability (OpenTelemetry instrumentation)
 """
+import asyncio
 import os
 import time
-import datetime
-from celery import Task
+from typing import Dict, Optional
+from celery import Task, states
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 import tenacity
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import pybreaker
-from app.core.database import SessionLocal
-from app.models.job import Job, JobLog, JobStatus
+from app.core.config import settings
+from app.core import metrics
+from app.core.database import SessionLocal, reset_sync_engine, sync_engine
+from app.core.events import publish_task_event
+from app.core.status_cache import invalidate_task_status
+from app.models.job import Job
+from app.services import backlog, job_state, memo
 from app.services.mock_external import MockExternalService
-import requests
-from bs4 import BeautifulSoup
+from app.services.log_sink import log_sink
+from app.services.progress import ProgressReporter
+from app.services.http_cache import get_response_cache
+from app.services.scraper import crawl, fetch_page, lookup_cached
+from app.services.blob_store import BlobRef, BlobIntegrityError, get_blob_store
+from app.services.vector_engine import VectorShapeError, process_matrix, to_matrix
 
 from app.core.celery_app import celery_app
 
 # --- Resiliency Configuration ---
 
+class BreakerMetricsListener(pybreaker.CircuitBreakerListener):
+    """Exports circuit breaker state changes to Prometheus."""
+    def state_change(self, cb, old_state, new_state):
+        metrics.set_breaker_state(cb.name, new_state.name)
+
 # Circuit Breaker: Trip after 5 consecutive failures, reset timeout 60s
-service_breaker = pybreaker.CircuitBreaker(state_storage=pybreaker.CircuitMemoryStorage(pybreaker.STATE_CLOSED), fail_max=5, reset_timeout=60)
+service_breaker = pybreaker.CircuitBreaker(state_storage=pybreaker.CircuitMemoryStorage(pybreaker.STATE_CLOSED), fail_max=5, reset_timeout=60, name="external_service", listeners=[BreakerMetricsListener()])
+metrics.set_breaker_state(service_breaker.name, service_breaker.current_state)
+
+metrics.instrument_engine(sync_engine, "sync")
+
+# task_id -> perf_counter() at start, for the run time histogram
+_run_started: Dict[str, float] = {}
 
 mock_service = MockExternalService(failure_rate=0.3) # 30% failure chance
 
@@ -41,94 +63,178 @@ def call_external_service_safely(data: list, metadata: dict):
     """
     return mock_service.perform_risky_operation(data, metadata)
 
+def _record_run(db, row):
+    """Feed a finished job's run time into the backlog estimator's rollup (same transaction)."""
+    if row is not None and row.started_at and row.completed_at:
+        backlog.record_run(db, row.task_type, row.duration, (row.completed_at - row.started_at).total_seconds())
+
 class DatabaseTask(Task):
     """
     Custom Celery Task base class.
     Automatically updates the Job status in PostgreSQL upon success, failure, or retry.
     This ensures the Database is always the "Source of Truth" for job status.
+    State changes are also published to the task event bus for SSE clients; terminal
+    states only from on_success / on_failure, once the job's outcome is final.
     """
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        task_id = task_id or self.request.id
+        if task_id and state not in states.READY_STATES:
+            publish_task_event(task_id, state, meta)
+
+    def before_start(self, task_id, args, kwargs):
+        _run_started[task_id] = time.perf_counter()
+
+    def _observe_run(self, task_id: str, outcome: str):
+        started = _run_started.pop(task_id, None)
+        if started is not None:
+            metrics.observe_task_run(self.name, outcome, time.perf_counter() - started)
+
     def on_success(self, retval, task_id, args, kwargs):
+        self._observe_run(task_id, "SUCCESS")
+        # Buffered logs must be visible before the job is reported as finished
+        log_sink.flush()
         job_id = kwargs.get('job_id') or (args[0] if args else None)
+        applied = True
         if job_id:
             with SessionLocal() as db:
-                job = db.query(Job).filter(Job.id == job_id).first()
-                if job:
-                    job.status = JobStatus.SUCCESS.value
-                    job.result_payload = retval
-                    job.completed_at = datetime.datetime.utcnow()
-                    db.commit()
+                row = job_state.transition(db, job_id, job_state.SUCCESS, commit=False, result_payload=retval)
+                _record_run(db, row)
+                db.commit()
+                applied = row is not None
+            if applied:
+                memo.job_finished(row.task_type, row.input_hash, job_id, succeeded=True)
+        invalidate_task_status(job_id or task_id)
+        # A job cancelled meanwhile stays CANCELLED; do not announce a success
+        if applied:
+            publish_task_event(task_id, "SUCCESS", retval)
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
+        self._observe_run(task_id, "FAILURE")
         job_id = kwargs.get('job_id') or (args[0] if args else None)
+        if job_id:
+            # Log the error
+            log_to_db(job_id, str(exc), level="ERROR")
+        log_sink.flush()
+        applied = True
         if job_id:
             with SessionLocal() as db:
-                job = db.query(Job).filter(Job.id == job_id).first()
-                if job:
-                    job.status = JobStatus.FAILED.value
-                    # Log the error
-                    log = JobLog(job_id=job_id, level="ERROR", message=str(exc))
-                    db.add(log)
-                    job.completed_at = datetime.datetime.utcnow()
-                    db.commit()
+                row = job_state.transition(db, job_id, job_state.FAILED, commit=False)
+                _record_run(db, row)
+                db.commit()
+                applied = row is not None
+            if applied:
+                memo.job_finished(row.task_type, row.input_hash, job_id, succeeded=False)
+        invalidate_task_status(job_id or task_id)
+        if applied:
+            publish_task_event(task_id, "FAILURE", {"exc_type": type(exc).__name__, "exc_message": str(exc)})
 
     def on_retry(self, exc, task_id, args, kwargs, einfo):
+        self._observe_run(task_id, "RETRY")
+        metrics.count_retry(self.name)
         job_id = kwargs.get('job_id') or (args[0] if args else None)
         if job_id:
+            log_to_db(job_id, f"Retrying task: {str(exc)}", level="WARNING")
             with SessionLocal() as db:
-                job = db.query(Job).filter(Job.id == job_id).first()
-                if job:
-                    job.retry_count += 1
-                    log = JobLog(job_id=job_id, level="WARNING", message=f"Retrying task: {str(exc)}")
-                    db.add(log)
-                    db.commit()
+                job_state.record_retry(db, job_id)
+        log_sink.flush()
+        invalidate_task_status(job_id or task_id)
+        publish_task_event(task_id, "RETRY", {"exc_message": str(exc)})
 
-def log_to_db(job_id: str, message: str, level: str = "INFO"):
+def _start_job(task: Task, job_id: str) -> bool:
+    """PENDING/RUNNING -> RUNNING. False if the job was cancelled (or finished) meanwhile."""
     with SessionLocal() as db:
-        log = JobLog(job_id=job_id, level=level, message=message)
-        db.add(log)
-        db.commit()
+        row = job_state.transition(db, job_id, job_state.RUNNING)
+    invalidate_task_status(job_id)
+    if row is not None and not task.request.retries and row.created_at and row.started_at:
+        metrics.observe_queue_wait(task.name, (row.started_at - row.created_at).total_seconds())
+    return row is not None
+
+def _skipped(job_id: str) -> dict:
+    log_to_db(job_id, "Job is no longer runnable (cancelled or finished); skipping.", level="WARNING")
+    return {"status": "skipped"}
 
-@celery_app.task(name="process_vector_data", base=DatabaseTask, bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
-def process_vector_data(self, job_id: str, vector_data: list[float], metadata: dict, duration: int = 10):
+def _progress_reporter(task: Task, job_id: str) -> ProgressReporter:
+    """Throttled PROGRESS updates for `task` (see app.services.progress)."""
+    return ProgressReporter(lambda meta: task.update_state(state='PROGRESS', meta=meta), job_id)
+
+def log_to_db(job_id: str, message: str, level: str = "INFO"):
     """
-    Simulates a long-running vector DB operation with progress updates and persistence.
+    Queue a log line for the job. Rows are written in batches by `log_sink`.
     """
-    with SessionLocal() as db:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job.status = JobStatus.RUNNING.value
-            job.started_at = datetime.datetime.utcnow()
-            db.commit()
+    log_sink.add(job_id, message, level)
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """Serve Prometheus metrics from the worker main process (aggregates all children)."""
+    if settings.WORKER_METRICS_PORT:
+        metrics.clear_multiprocess_dir()
+        metrics.start_exporter(settings.WORKER_METRICS_PORT)
+
+@worker_process_init.connect
+def reset_db_pool_after_fork(**kwargs):
+    """Each prefork child builds its own pool instead of reusing the parent's connections."""
+    reset_sync_engine()
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    metrics.mark_process_dead(pid)
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_logs_on_shutdown(**kwargs):
+    """Prefork children exit without running atexit handlers, so flush explicitly."""
+    log_sink.close()
+
+@celery_app.task(name="process_vector_data", base=DatabaseTask, bind=True, autoretry_for=(Exception,), dont_autoretry_for=(VectorShapeError, BlobIntegrityError), retry_backoff=True, retry_kwargs={'max_retries': 3})
+def process_vector_data(self, job_id: str, vector_data: Optional[list[float]], metadata: dict, duration: int = 10, dimension: Optional[int] = None, vector_ref: Optional[dict] = None):
+    """
+    Normalizes and profiles a batch of embedding vectors, then indexes it in the external vector service.
+    `vector_data` is a flat list of `dimension`-sized vectors (a single vector if `dimension` is None).
+    Large payloads arrive as `vector_ref` (claim check) instead, and are memory-mapped from the blob store.
+    The work is done chunk by chunk by the NumPy engine in `app.services.vector_engine`;
+    `duration` is accepted for API compatibility and no longer simulates work.
+    """
+    if not _start_job(self, job_id):
+        return _skipped(job_id)
+    progress = _progress_reporter(self, job_id)
 
     log_to_db(job_id, "Task started processing.")
+    progress.set_phase("loading")
 
-    total_steps = duration
-    for i in range(total_steps):
-        time.sleep(1)
-        
-        message = f'Processing chunk {i + 1}/{total_steps}...'
-        self.update_state(state='PROGRESS', meta={
-            'current': i + 1,
-            'total': total_steps,
-            'message': message,
-            'job_id': job_id
-        })
-        
-        if i % max(1, total_steps // 5) == 0:
+    if vector_ref:
+        ref = BlobRef.from_dict(vector_ref)
+        source = get_blob_store().open_array(ref, verify=settings.BLOB_VERIFY_CHECKSUM)
+    else:
+        source = vector_data
+    matrix = to_matrix(source, dimension)
+    log_to_db(job_id, f"Loaded {matrix.shape[0]} vectors of dimension {matrix.shape[1]}.")
+    progress.set_phase("processing", total=matrix.shape[0])
+
+    def on_chunk(index: int, total_chunks: int, chunk):
+        message = f'Processing chunk {index + 1}/{total_chunks}...'
+        progress.advance(chunk.shape[0], message)
+
+        # Index a sample of chunks in the external service (at most ~5 calls per job)
+        if index % max(1, total_chunks // 5) == 0:
             log_to_db(job_id, message)
             try:
-                result = call_external_service_safely(vector_data, metadata)
+                result = call_external_service_safely(chunk, metadata)
                 log_to_db(job_id, f"External Service Success: {result['external_id']}")
             except pybreaker.CircuitBreakerError:
                 log_to_db(job_id, "External Service Skipped (Circuit Breaker OPEN)", level="WARNING")
             except Exception as e:
                 log_to_db(job_id, f"External Service Failed after retries: {str(e)}", level="ERROR")
-    
+
+    stats = process_matrix(matrix, settings.VECTOR_CHUNK_SIZE, on_chunk)
+    progress.flush_pending()
+
     log_to_db(job_id, "Task processing complete.")
 
     return {
-        "processed_vectors": len(vector_data),
+        "processed_vectors": stats.count,
         "status": "indexed",
+        "stats": stats.to_dict(),
         "metadata_processed": metadata
     }
 
@@ -137,68 +243,108 @@ def scrape_website(self, job_id: str, url: str):
     """
     Scrapes a website and extracts metadata.
     """
-    with SessionLocal() as db:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job.status = JobStatus.RUNNING.value
-            job.started_at = datetime.datetime.utcnow()
-            db.commit()
+    if not _start_job(self, job_id):
+        return _skipped(job_id)
+    progress = _progress_reporter(self, job_id)
 
     log_to_db(job_id, f"Starting scrape for {url}")
 
     try:
-        # Simulate some setup time
-        time.sleep(1)
-        self.update_state(state='PROGRESS', meta={'message': 'Connecting to site...', 'job_id': job_id})
-        
-        # 1. Fetch
-        log_to_db(job_id, "Sending HTTP GET Request...")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # 2. Parse
-        self.update_state(state='PROGRESS', meta={'message': 'Parsing HTML...', 'job_id': job_id})
-        log_to_db(job_id, "Parsing HTML content...")
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Simulate processing time
-        time.sleep(2)
-        
-        # 3. Extract
-        title = soup.title.string if soup.title else "No Title"
-        description = "No description"
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc:
-            description = meta_desc.get("content")
-            
-        h1_count = len(soup.find_all('h1'))
-        links = len(soup.find_all('a'))
-        images = len(soup.find_all('img'))
-        
-        result = {
-            "url": url,
-            "title": title,
-            "description": description,
-            "stats": {
-                "h1_tags": h1_count,
-                "links": links,
-                "images": images
-            }
-        }
-        
+        progress.set_phase("connecting", message="Connecting to site...")
+
+        # 1. Fetch (conditional GET when a cached copy exists)
+        cache = get_response_cache()
+        entry, result = lookup_cached(cache, url)
+        if result is not None:
+            log_to_db(job_id, "Serving fresh cached copy (no request sent).")
+        else:
+            if entry is None:
+                # Simulate some setup time (first scrape of the page only)
+                time.sleep(1)
+            # 2. Parse: the page is extracted while it downloads
+            progress.set_phase("fetching", message="Downloading and parsing HTML...")
+            log_to_db(job_id, "Sending HTTP GET Request (streaming parse)...")
+            result = fetch_page(url, cache, entry, timeout=10)
+            if result is None:
+                result = fetch_page(url, cache, timeout=10)
+            if result["cache"] == "revalidated":
+                # Nothing new to process: the repeat scrape costs the conditional round trip only
+                log_to_db(job_id, "Page not modified; reused cached extraction.")
+            else:
+                # Simulate processing time
+                progress.set_phase("processing", message="Processing extracted metadata...")
+                time.sleep(2)
+
         log_to_db(job_id, "Scrape complete successfully.")
         return result
 
     except Exception as e:
         error_msg = f"Scrape failed: {str(e)}"
         log_to_db(job_id, error_msg, level="ERROR")
-        # Explicitly fail the task state so the listener catches it
-        self.update_state(state='FAILURE', meta={
-            'exc_type': type(e).__name__,
-            'exc_message': str(e),
-            'job_id': job_id
-        })
-        raise e
\ No newline at end of file
+        # No FAILURE state here: autoretry may still run the task again. on_failure
+        # records and announces the failure once retries are exhausted.
+        raise e
+
+def _save_partial_result(job_id: str, result: dict):
+    with SessionLocal() as db:
+        # Only while running: never overwrite the payload of a finished or cancelled job
+        db.query(Job).filter(Job.id == job_id, Job.status == job_state.RUNNING).update({Job.result_payload: result})
+        db.commit()
+    invalidate_task_status(job_id)
+
+def _batch_summary(urls: list, results: list, done: int) -> dict:
+    completed = [r for r in results if r is not None]
+    failed = [r for r in completed if not r["ok"]]
+    return {
+        "total": len(urls),
+        "completed": done,
+        "succeeded": len(completed) - len(failed),
+        "failed": len(failed),
+        "errors": [{"url": r["url"], "error": r["error"]} for r in failed],
+        "results": completed,
+    }
+
+@celery_app.task(name="scrape_batch", base=DatabaseTask, bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={'max_retries': 3})
+def scrape_batch(self, job_id: str, urls: list[str]):
+    """
+    Scrapes many URLs concurrently within one worker slot.
+    Uses a pooled async HTTP client with global and per-host concurrency limits. Each
+    completed URL reports progress, and partial results are saved to the job periodically.
+    A failing URL is reported in the result; it does not fail the task.
+    """
+    if not _start_job(self, job_id):
+        return _skipped(job_id)
+    progress = _progress_reporter(self, job_id)
+
+    log_to_db(job_id, f"Starting batch scrape of {len(urls)} URLs")
+    results: list = [None] * len(urls)
+    last_saved = time.monotonic()
+    progress.set_phase("crawling", total=len(urls))
+
+    async def on_result(index: int, result: dict):
+        nonlocal last_saved
+        results[index] = result
+        if result["ok"]:
+            log_to_db(job_id, f"Scraped {result['url']} ({result['elapsed_ms']} ms)")
+        else:
+            log_to_db(job_id, f"Failed {result['url']}: {result['error']}", level="WARNING")
+        progress.advance(1, f"Scraped {progress.done + 1}/{len(urls)} URLs")
+        # Stream partial results into the job without a DB write per URL
+        if time.monotonic() - last_saved >= settings.SCRAPE_PARTIAL_SAVE_INTERVAL:
+            last_saved = time.monotonic()
+            partial = dict(_batch_summary(urls, results, progress.done), partial=True)
+            await asyncio.to_thread(_save_partial_result, job_id, partial)
+
+    asyncio.run(crawl(
+        urls,
+        on_result=on_result,
+        concurrency=settings.SCRAPE_CONCURRENCY,
+        per_host=settings.SCRAPE_PER_HOST_CONCURRENCY,
+        timeout=settings.SCRAPE_TIMEOUT,
+        cache=get_response_cache(),
+    ))
+
+    progress.flush_pending()
+    summary = _batch_summary(urls, results, progress.done)
+    log_to_db(job_id, f"Batch scrape complete: {summary['succeeded']} succeeded, {summary['failed']} failed.")
+    return summary
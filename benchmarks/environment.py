@@ -0,0 +1,165 @@
+"""
+In-Process Benchmark Environment.
+Runs the API (uvicorn, in a thread), a Celery worker (threads pool, in a thread) and the
+HTML fixture server in one process, against local stand-ins:
+
+* Redis (event bus, status cache, memo) -> fakeredis, one in-memory server shared by all clients
+* Celery broker / result backend        -> kombu `memory://` / `cache+memory://`
+* PostgreSQL                            -> SQLite in WAL mode (or `database_url`, e.g. a local Postgres)
+
+Settings are read when the `app` package is imported, so `LocalStack` configures the
+environment first and imports the application lazily in `start()`.
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from benchmarks.fixture_server import FixtureServer
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # API and worker threads write concurrently; wait for the lock instead of failing
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+def configure_environment(workdir: str, database_url: str, sync_database_url: str, **overrides: str):
+    """Settings for a local run; call before anything imports `app`."""
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "SYNC_DATABASE_URL": sync_database_url,
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+        "BLOB_STORE_PATH": os.path.join(workdir, "blobs"),
+        "HTTP_CACHE_PATH": os.path.join(workdir, "http_cache"),
+        "HTTP_CACHE_ENABLED": "false",
+        "WORKER_METRICS_PORT": "0",
+        **overrides,
+    })
+
+
+def patch_redis():
+    """Route every Redis client created from a URL to one shared in-memory fakeredis server."""
+    import fakeredis
+    import redis
+    import redis.asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    redis.Redis.from_url = classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server))
+    aioredis.Redis.from_url = classmethod(lambda cls, url, **kwargs: fakeredis.FakeAsyncRedis(server=server))
+
+
+def enable_sqlite_concurrency(*engines):
+    """WAL and a busy timeout on SQLite engines shared by API and worker threads."""
+    from sqlalchemy import event
+
+    for engine in engines:
+        engine = getattr(engine, "sync_engine", engine)
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _sqlite_pragmas)
+
+
+class LocalStack:
+    """
+    Context manager: API + worker + fixture server. `api_url` and `fixture` are available
+    once started.
+    """
+
+    def __init__(
+        self,
+        workdir: Optional[str] = None,
+        database_url: Optional[str] = None,
+        sync_database_url: Optional[str] = None,
+        worker_concurrency: int = 8,
+        external_failure_rate: float = 0.0,
+        settings: Optional[Dict[str, str]] = None,
+    ):
+        self.workdir = workdir or tempfile.mkdtemp(prefix="bench-")
+        self.database_url = database_url or f"sqlite+aiosqlite:///{self.workdir}/bench.db"
+        self.sync_database_url = sync_database_url or f"sqlite:///{self.workdir}/bench.db"
+        self.worker_concurrency = worker_concurrency
+        self.external_failure_rate = external_failure_rate
+        self.extra_settings = settings or {}
+        self.api_url = None
+        self.fixture: Optional[FixtureServer] = None
+        self._server = None
+        self._server_thread = None
+        self._worker_context = None
+
+    def _start_api(self):
+        import uvicorn
+
+        from app.core.database import engine, sync_engine
+        from app.main import app
+
+        enable_sqlite_concurrency(engine, sync_engine)
+
+        port = _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._server_thread = threading.Thread(target=self._server.run, name="bench-api", daemon=True)
+        self._server_thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._server_thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+        self.api_url = f"http://127.0.0.1:{port}"
+
+    def _start_worker(self):
+        if self.worker_concurrency <= 0:
+            return
+        from celery.contrib.testing.worker import start_worker
+
+        from app import worker
+        from app.core.celery_app import celery_app
+
+        worker.mock_service.failure_rate = self.external_failure_rate
+        queues = [queue.name for queue in celery_app.conf.task_queues]
+        self._worker_context = start_worker(
+            celery_app,
+            pool="threads",
+            concurrency=self.worker_concurrency,
+            perform_ping_check=False,
+            loglevel="WARNING",
+            queues=queues,
+            shutdown_timeout=60,
+        )
+        self._worker_context.__enter__()
+
+    def start(self) -> "LocalStack":
+        configure_environment(self.workdir, self.database_url, self.sync_database_url, **self.extra_settings)
+        patch_redis()
+        self.fixture = FixtureServer().start()
+        self._start_api()
+        self._start_worker()
+        return self
+
+    def stop(self):
+        if self._worker_context is not None:
+            self._worker_context.__exit__(None, None, None)
+            self._worker_context = None
+        if self._server is not None:
+            self._server.should_exit = True
+            self._server_thread.join(timeout=30)
+            self._server = None
+        if self.fixture is not None:
+            self.fixture.stop()
+            self.fixture = None
+
+    def __enter__(self) -> "LocalStack":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
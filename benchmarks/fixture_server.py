@@ -0,0 +1,107 @@
+"""
+Local HTTP Fixture Server.
+Deterministic HTML pages for scrape benchmarks, so no run depends on the internet.
+
+    GET /page/<bytes>?n=<i>&delay_ms=<ms>
+
+returns a page of roughly `<bytes>` bytes (title, meta description, headings, paragraphs
+and links); `n` only makes URLs unique, `delay_ms` simulates server latency.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+# Page sizes used by the benchmarks (bytes)
+PAGE_SIZES = {"small": 8 * 1024, "medium": 128 * 1024, "large": 2 * 1024 ** 2}
+
+_WORDS = (
+    "queue worker broker latency throughput partition vector scrape cache retry circuit "
+    "breaker backlog status stream event job result payload index batch"
+).split()
+
+
+def make_page(size: int, seed: int = 0) -> bytes:
+    """An HTML document of about `size` bytes; the same (size, seed) gives the same page."""
+    rng = random.Random(seed * 1_000_003 + size)
+    head = (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>Fixture page {seed} ({size} bytes)</title>"
+        "<meta name=\"description\" content=\"Benchmark fixture page\">"
+        "</head><body>"
+    )
+    parts = [head]
+    length = len(head)
+    section = 0
+    while length < size:
+        section += 1
+        words = " ".join(rng.choice(_WORDS) for _ in range(60))
+        block = (
+            f"<h1>Section {section}</h1><div class=\"content\"><p>{words}</p>"
+            f"<ul><li><a href=\"/page/{size}?n={section}\">{section}</a></li>"
+            f"<li><a href=\"#s{section}\">anchor</a></li></ul></div>"
+        )
+        parts.append(block)
+        length += len(block)
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        segments = parsed.path.strip("/").split("/")
+        if len(segments) != 2 or segments[0] != "page" or not segments[1].isdigit():
+            self.send_error(404)
+            return
+        query = parse_qs(parsed.query)
+        delay_ms = float(query.get("delay_ms", ["0"])[0])
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        body = self.server.page(int(segments[1]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Threaded fixture server on 127.0.0.1 (an ephemeral port unless `port` is given)."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self._pages = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def page(self, size: int) -> bytes:
+        if size not in self._pages:
+            self._pages[size] = make_page(size)
+        return self._pages[size]
+
+    def url(self, size: int, n: int = 0, delay_ms: float = 0) -> str:
+        url = f"{self.base_url}/page/{size}?n={n}"
+        return f"{url}&delay_ms={delay_ms:g}" if delay_ms else url
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fixture-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
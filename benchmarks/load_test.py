@@ -0,0 +1,324 @@
+"""
+Load Test Harness.
+Drives the submit / poll / stream paths of an in-process stack (see benchmarks.environment)
+and reports latency percentiles and throughput per operation.
+
+    python -m benchmarks.load_test submit --requests 500 --concurrency 50
+    python -m benchmarks.load_test all --compare            # against benchmarks/baselines/
+    python -m benchmarks.load_test mixed --save-baseline
+
+Workloads:
+    submit  burst of POST /tasks (vector and scrape jobs)
+    batch   the same number of jobs one by one and through POST /tasks/batch (tasks/s of each)
+    poll    polling storm on GET /tasks/{id} (conditional requests with If-None-Match)
+    sse     concurrent SSE watchers on /tasks/{id}/stream: first event and completion
+    mixed   scrape (local fixture server) and vector jobs, end to end until finished
+
+Run from the repository root. Exit status 1 when `--compare` finds a regression.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from benchmarks import stats
+from benchmarks.environment import LocalStack
+from benchmarks.fixture_server import PAGE_SIZES
+
+TERMINAL = {"SUCCESS", "FAILURE", "REVOKED"}
+
+# Payload numbers, unique across workloads: identical inputs would be answered by task
+# memoization instead of running
+_sequence = itertools.count()
+
+
+def vector_payload(n: int, dimension: int = 64, rows: int = 16) -> Dict[str, Any]:
+    rng = random.Random(n)
+    return {
+        "task_type": "vector_processing",
+        "vector_data": [rng.random() for _ in range(dimension * rows)],
+        "dimension": dimension,
+        "metadata": {"bench": n},
+        "duration": 1,
+    }
+
+
+def scrape_payload(stack: LocalStack, n: int, size: str = "medium") -> Dict[str, Any]:
+    return {"task_type": "web_scrape", "url": stack.fixture.url(PAGE_SIZES[size], n), "metadata": {}}
+
+
+def payload_for(stack: LocalStack, n: int, scrape_fraction: float) -> Dict[str, Any]:
+    if random.Random(n).random() < scrape_fraction:
+        return scrape_payload(stack, n)
+    return vector_payload(n)
+
+
+async def _bounded(concurrency: int, jobs: List[Callable]):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        async with semaphore:
+            return await job()
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def _submit(client: httpx.AsyncClient, payload: Dict[str, Any], recorder: stats.Recorder):
+    started = time.perf_counter()
+    try:
+        response = await client.post("/tasks", json=payload)
+        ok = response.status_code in (200, 202)
+    except httpx.HTTPError:
+        ok = False
+    recorder.add(started, ok)
+    return response.json()["task_id"] if ok else None
+
+
+async def _submit_all(client, stack, count: int, concurrency: int, scrape_fraction: float, recorder):
+    ids = await _bounded(concurrency, [
+        (lambda n=next(_sequence): _submit(client, payload_for(stack, n, scrape_fraction), recorder))
+        for _ in range(count)
+    ])
+    return [task_id for task_id in ids if task_id]
+
+
+async def _watch(client: httpx.AsyncClient, task_id: str, first: stats.Recorder, done: stats.Recorder,
+                 started: float, timeout: float) -> str:
+    """Follow /tasks/{id}/stream until a terminal status; returns that status."""
+    seen_first = False
+    try:
+        async with client.stream("GET", f"/tasks/{task_id}/stream", timeout=timeout) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                if not seen_first:
+                    first.add(started)
+                    seen_first = True
+                status = json.loads(line[6:])["status"]
+                if status in TERMINAL:
+                    done.add(started, status == "SUCCESS")
+                    return status
+    except httpx.HTTPError:
+        pass
+    if not seen_first:
+        first.add(started, ok=False)
+    done.add(started, ok=False)
+    return "ERROR"
+
+
+async def submit_workload(client, stack, args) -> Dict[str, stats.Recorder]:
+    recorder = stats.Recorder()
+    await _submit_all(client, stack, args.requests, args.concurrency, args.scrape_fraction, recorder)
+    return {"submit": recorder}
+
+
+async def _submit_batch(client: httpx.AsyncClient, payloads: List[Dict[str, Any]], recorder: stats.Recorder):
+    started = time.perf_counter()
+    try:
+        response = await client.post("/tasks/batch", json=payloads)
+        ok = response.status_code == 202
+    except httpx.HTTPError:
+        ok = False
+    recorder.add(started, ok)
+    return response.json()["task_ids"] if ok else []
+
+
+def _tasks_per_second(recorder: stats.Recorder, tasks: int) -> float:
+    span = (recorder.last - recorder.first) if recorder.first is not None else 0.0
+    return round(tasks / span, 2) if span > 0 else 0.0
+
+
+async def batch_workload(client, stack, args) -> Dict[str, stats.Recorder]:
+    """`--requests` jobs per mode; `submit_batch` latencies are per batch of `--batch-size`."""
+    single = stats.Recorder()
+    await _submit_all(client, stack, args.requests, args.concurrency, args.scrape_fraction, single)
+    single.extra["tasks_per_s"] = _tasks_per_second(single, len(single.samples))
+
+    batched = stats.Recorder()
+    payloads = [payload_for(stack, next(_sequence), args.scrape_fraction) for _ in range(args.requests)]
+    batches = [payloads[i:i + args.batch_size] for i in range(0, len(payloads), args.batch_size)]
+    ids = await _bounded(args.concurrency, [
+        (lambda batch=batch: _submit_batch(client, batch, batched)) for batch in batches
+    ])
+    batched.extra["tasks_per_s"] = _tasks_per_second(batched, sum(len(task_ids) for task_ids in ids))
+    return {"submit": single, "submit_batch": batched}
+
+
+async def poll_workload(client, stack, args) -> Dict[str, stats.Recorder]:
+    task_ids = await _submit_all(client, stack, args.jobs, args.concurrency, args.scrape_fraction, stats.Recorder())
+    recorder = stats.Recorder()
+    not_modified = 0
+    deadline = time.monotonic() + args.duration
+
+    async def poller(index: int):
+        nonlocal not_modified
+        task_id = task_ids[index % len(task_ids)]
+        etag = None
+        while time.monotonic() < deadline:
+            headers = {"If-None-Match": etag} if etag else {}
+            started = time.perf_counter()
+            try:
+                response = await client.get(f"/tasks/{task_id}", params={"include_logs": "false"}, headers=headers)
+                ok = response.status_code in (200, 304)
+            except httpx.HTTPError:
+                ok = False
+            recorder.add(started, ok)
+            if ok:
+                not_modified += response.status_code == 304
+                etag = response.headers.get("etag", etag)
+            if args.poll_interval:
+                await asyncio.sleep(args.poll_interval)
+
+    await asyncio.gather(*(poller(i) for i in range(args.pollers)))
+    recorder.extra["not_modified_ratio"] = round(not_modified / max(1, len(recorder.samples)), 4)
+    return {"poll": recorder}
+
+
+async def sse_workload(client, stack, args) -> Dict[str, stats.Recorder]:
+    task_ids = await _submit_all(client, stack, args.jobs, args.concurrency, args.scrape_fraction, stats.Recorder())
+    first, done = stats.Recorder(), stats.Recorder()
+    await asyncio.gather(*(
+        _watch(client, task_ids[i % len(task_ids)], first, done, time.perf_counter(), args.timeout)
+        for i in range(args.watchers)
+    ))
+    return {"sse_first_event": first, "sse_until_complete": done}
+
+
+async def mixed_workload(client, stack, args) -> Dict[str, stats.Recorder]:
+    submit = stats.Recorder()
+    recorders = {"scrape": (stats.Recorder(), stats.Recorder()), "vector": (stats.Recorder(), stats.Recorder())}
+
+    async def one(n: int):
+        payload = payload_for(stack, n, args.scrape_fraction)
+        kind = "scrape" if payload["task_type"] == "web_scrape" else "vector"
+        started = time.perf_counter()
+        task_id = await _submit(client, payload, submit)
+        first, done = recorders[kind]
+        if task_id is None:
+            done.add(started, ok=False)
+            return
+        await _watch(client, task_id, first, done, started, args.timeout)
+
+    await _bounded(args.concurrency, [(lambda n=next(_sequence): one(n)) for _ in range(args.requests)])
+    results = {"submit": submit}
+    for kind, (first, done) in recorders.items():
+        if first.samples or done.samples or done.errors:
+            results[f"{kind}_end_to_end"] = done
+    return results
+
+
+WORKLOADS = {
+    "submit": submit_workload,
+    "batch": batch_workload,
+    "poll": poll_workload,
+    "sse": sse_workload,
+    "mixed": mixed_workload,
+}
+
+
+async def _run(stack: LocalStack, names: List[str], args) -> Dict[str, Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    results = {}
+    async with httpx.AsyncClient(base_url=stack.api_url, limits=limits, timeout=args.timeout) as client:
+        for name in names:
+            started = time.perf_counter()
+            recorders = await WORKLOADS[name](client, stack, args)
+            results[name] = {
+                "workload": name,
+                "environment": stats.environment(),
+                "config": {key: value for key, value in vars(args).items() if key in CONFIG_KEYS},
+                "wall_seconds": round(time.perf_counter() - started, 3),
+                "operations": {op: recorder.summary() for op, recorder in recorders.items()},
+            }
+    return results
+
+
+CONFIG_KEYS = {
+    "requests", "concurrency", "connections", "batch_size", "jobs", "pollers", "poll_interval", "duration",
+    "watchers", "scrape_fraction", "worker_concurrency",
+}
+
+
+SUMMARY_KEYS = {"count", "errors", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms", "throughput_per_s"}
+
+
+def _print(result: Dict[str, Any]):
+    print(f"\n== {result['workload']} ({result['wall_seconds']} s)")
+    print(f"{'operation':<22}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ops/s':>10}")
+    for name, op in result["operations"].items():
+        print(
+            f"{name:<22}{op['count']:>7}{op['errors']:>5}{op['p50_ms']:>10.1f}{op['p95_ms']:>10.1f}"
+            f"{op['p99_ms']:>10.1f}{op['max_ms']:>10.1f}{op['throughput_per_s']:>10.1f}"
+        )
+        extra = {key: value for key, value in op.items() if key not in SUMMARY_KEYS}
+        if extra:
+            print(f"{'':<22}" + "  ".join(f"{key}={value}" for key, value in extra.items()))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workload", choices=sorted(WORKLOADS) + ["all"])
+    parser.add_argument("--requests", type=int, default=200, help="submissions (submit, mixed)")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent submitters")
+    parser.add_argument("--batch-size", type=int, default=50, help="tasks per POST /tasks/batch (batch)")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--jobs", type=int, default=20, help="jobs to poll / watch (poll, sse)")
+    parser.add_argument("--pollers", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=0.0, help="seconds between polls of one client")
+    parser.add_argument("--duration", type=float, default=10.0, help="poll storm length in seconds")
+    parser.add_argument("--watchers", type=int, default=100, help="concurrent SSE watchers")
+    parser.add_argument("--scrape-fraction", type=float, default=0.5, help="share of scrape jobs")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per request / stream timeout")
+    parser.add_argument("--worker-concurrency", type=int, default=8, help="worker threads; 0 = API only")
+    parser.add_argument("--external-failure-rate", type=float, default=0.0, help="mock external service failures")
+    parser.add_argument("--database", default=None, help="async database URL (default: SQLite in a temp dir)")
+    parser.add_argument("--sync-database", default=None, help="sync database URL matching --database")
+    parser.add_argument("--output", help="write all results to this JSON file")
+    parser.add_argument("--compare", action="store_true", help="compare with benchmarks/baselines/<workload>.json")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (fraction)")
+    args = parser.parse_args(argv)
+    if args.database and not args.sync_database:
+        parser.error("--sync-database is required with --database")
+
+    names = sorted(WORKLOADS) if args.workload == "all" else [args.workload]
+    with LocalStack(
+        database_url=args.database,
+        sync_database_url=args.sync_database,
+        worker_concurrency=args.worker_concurrency,
+        external_failure_rate=args.external_failure_rate,
+    ) as stack:
+        results = asyncio.run(_run(stack, names, args))
+
+    regressions = []
+    for name, result in results.items():
+        _print(result)
+        if args.compare:
+            baseline = stats.load(stats.baseline_path(name))
+            if baseline is None:
+                print(f"No baseline for {name}")
+            else:
+                if baseline.get("config") != result["config"] or baseline.get("environment") != result["environment"]:
+                    print(f"Warning: {name} baseline was recorded with a different config or machine")
+                regressions += [f"{name}: {line}" for line in stats.compare(result, baseline, args.tolerance)]
+        if args.save_baseline:
+            stats.save(result, stats.baseline_path(name))
+    if args.output:
+        stats.save(results, args.output)
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Micro-Benchmark Fixtures.
+Worker hot paths in isolation: SQLite database (in a temp dir), fakeredis, in-memory
+Celery result backend, generated HTML pages.
+
+    python -m pytest benchmarks/micro --benchmark-only
+    python -m pytest benchmarks/micro --benchmark-autosave          # .benchmarks/ history
+    python -m pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Besides timings, each benchmark records allocations per call in `extra_info`
+(tracemalloc, measured in a separate pass so tracing does not skew the timings):
+`alloc_peak_bytes` (peak traced memory during one call) and `alloc_net_blocks` /
+`alloc_net_bytes` (memory still held after the call, i.e. growth per call).
+"""
+import datetime
+import tempfile
+import tracemalloc
+import uuid
+
+import pytest
+
+from benchmarks.environment import configure_environment, patch_redis
+
+_WORKDIR = tempfile.mkdtemp(prefix="microbench-")
+configure_environment(_WORKDIR, f"sqlite+aiosqlite:///{_WORKDIR}/micro.db", f"sqlite:///{_WORKDIR}/micro.db")
+patch_redis()
+
+ALLOCATION_ROUNDS = 20
+
+
+def measure_allocations(fn, rounds: int = ALLOCATION_ROUNDS) -> dict:
+    fn()  # warm caches and lazily created objects first
+    tracemalloc.start()
+    try:
+        peak = 0
+        before = tracemalloc.take_snapshot()
+        for _ in range(rounds):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            fn()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return {
+        "alloc_peak_bytes": peak,
+        "alloc_net_blocks": round(sum(stat.count_diff for stat in diff) / rounds, 2),
+        "alloc_net_bytes": round(sum(stat.size_diff for stat in diff) / rounds, 1),
+    }
+
+
+@pytest.fixture
+def allocations(benchmark):
+    """`allocations(fn)`: record allocation counts of `fn()` in the benchmark's extra_info."""
+    def record(fn, rounds: int = ALLOCATION_ROUNDS):
+        benchmark.extra_info.update(measure_allocations(fn, rounds))
+    return record
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    from app.core.database import Base, sync_engine
+    import app.models.job  # noqa: F401  (register tables)
+
+    Base.metadata.create_all(sync_engine)
+    return sync_engine
+
+
+@pytest.fixture
+def job_id(db_engine):
+    """A fresh RUNNING job."""
+    from app.core.database import SessionLocal
+    from app.models.job import Job, JobStatus
+
+    new_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(Job(
+            id=new_id,
+            status=JobStatus.RUNNING.value,
+            input_payload={"task_type": "vector_processing", "duration": 10},
+            created_at=datetime.datetime.utcnow(),
+            started_at=datetime.datetime.utcnow(),
+        ))
+        db.commit()
+    return new_id
@@ -0,0 +1,39 @@
+"""Overhead of the retry + circuit breaker wrapper around the external service."""
+import pybreaker
+import pytest
+
+from app import worker
+
+DATA = [0.1] * 64
+METADATA = {"source": "bench"}
+
+
+@pytest.fixture
+def instant_service(monkeypatch):
+    # No simulated latency or failures: only the wrapper is measured
+    monkeypatch.setattr(
+        worker.mock_service, "perform_risky_operation",
+        lambda data, metadata: {"status": "success", "processed_count": len(data), "external_id": "ext-1"},
+    )
+    worker.service_breaker.close()
+    yield
+    worker.service_breaker.close()
+
+
+def test_call_breaker_closed(benchmark, allocations, instant_service):
+    benchmark(worker.call_external_service_safely, DATA, METADATA)
+    allocations(lambda: worker.call_external_service_safely(DATA, METADATA))
+
+
+def test_call_breaker_open(benchmark, allocations, instant_service):
+    # Fast rejection while the breaker is open
+    worker.service_breaker.open()
+
+    def rejected():
+        try:
+            worker.call_external_service_safely(DATA, METADATA)
+        except pybreaker.CircuitBreakerError:
+            pass
+
+    benchmark(rejected)
+    allocations(rejected)
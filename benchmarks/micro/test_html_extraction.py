@@ -0,0 +1,27 @@
+"""HTML extraction in scrape tasks, over generated pages of increasing size."""
+import pytest
+
+from app.services.scraper import extract_page_metadata
+from benchmarks.fixture_server import PAGE_SIZES, make_page
+
+URL = "http://fixture.local/page"
+CHUNK_SIZE = 64 * 1024
+
+
+@pytest.fixture(scope="module", params=sorted(PAGE_SIZES, key=PAGE_SIZES.get))
+def page(request):
+    return make_page(PAGE_SIZES[request.param])
+
+
+def test_extract_whole_page(benchmark, allocations, page):
+    benchmark.extra_info["page_bytes"] = len(page)
+    benchmark(extract_page_metadata, URL, page)
+    allocations(lambda: extract_page_metadata(URL, page), rounds=5)
+
+
+def test_extract_streamed_chunks(benchmark, allocations, page):
+    # As in fetch_page: the body arrives in network-sized chunks
+    chunks = [page[i:i + CHUNK_SIZE] for i in range(0, len(page), CHUNK_SIZE)]
+    benchmark.extra_info["page_bytes"] = len(page)
+    benchmark(extract_page_metadata, URL, chunks, "text/html; charset=utf-8")
+    allocations(lambda: extract_page_metadata(URL, chunks, "text/html; charset=utf-8"), rounds=5)
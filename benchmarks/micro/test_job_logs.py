@@ -0,0 +1,21 @@
+"""Job log buffering: per-message enqueue cost and the batched INSERT."""
+from app.services.log_sink import log_sink
+from app.worker import log_to_db
+
+
+def test_log_to_db(benchmark, allocations, job_id):
+    # Every JOB_LOG_BATCH_SIZE-th call pays for the batch INSERT (amortized)
+    benchmark(log_to_db, job_id, "Processing chunk 3/10...")
+    log_sink.flush()
+    allocations(lambda: log_to_db(job_id, "Processing chunk 3/10..."))
+    log_sink.flush()
+
+
+def test_log_sink_flush_batch(benchmark, allocations, job_id):
+    def fill():
+        for i in range(log_sink.batch_size - 1):
+            log_sink.add(job_id, f"line {i}")
+        return (), {}
+
+    benchmark.pedantic(log_sink.flush, setup=fill, rounds=50)
+    allocations(lambda: (fill(), log_sink.flush()), rounds=5)
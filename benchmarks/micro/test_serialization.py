@@ -0,0 +1,103 @@
+"""Serialization codecs: Celery messages / results per serializer, and API JSON rendering."""
+import datetime
+import random
+import uuid
+
+import pytest
+from kombu import serialization as kombu_serialization
+from starlette.responses import JSONResponse
+
+from app.core.serialization import CELERY_SERIALIZERS, FastJSONResponse, register_celery_codecs
+
+register_celery_codecs("orjson")
+ACCEPT = kombu_serialization.prepare_accept_content(CELERY_SERIALIZERS)
+
+NOW = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+_rng = random.Random(0)
+
+# process_vector_data message: 1024 x 64 floats inline (below the claim-check threshold)
+VECTOR_MESSAGE = (
+    [{"vector_data": [_rng.random() for _ in range(1024 * 64)], "dimension": 64, "metadata": {"source": "bench"}}],
+    {},
+    {"callbacks": None, "errbacks": None, "chain": None, "chord": None},
+)
+
+# scrape_batch result: per-URL metadata and timings
+BATCH_RESULT = {
+    "status": "completed",
+    "finished_at": NOW,
+    "results": [
+        {
+            "url": f"https://example.com/page/{i}",
+            "status_code": 200,
+            "title": f"Page {i}",
+            "description": "A generated page " * 8,
+            "links": [f"https://example.com/page/{i}/{j}" for j in range(20)],
+            "elapsed_ms": _rng.random() * 500,
+            "fetched_at": NOW,
+            "request_id": uuid.UUID(int=i),
+        }
+        for i in range(500)
+    ],
+}
+
+# GET /tasks/{id}?include_logs=true body as cached by the status cache
+STATUS_BODY = {
+    "task_id": str(uuid.uuid4()),
+    "status": "RUNNING",
+    "created_at": NOW.isoformat(),
+    "result_payload": None,
+    "logs": [
+        {"timestamp": NOW.isoformat(), "level": "INFO", "message": f"Processing chunk {i}/500..."}
+        for i in range(500)
+    ],
+}
+
+
+@pytest.mark.benchmark(group="celery-vector-message")
+@pytest.mark.parametrize("serializer", CELERY_SERIALIZERS)
+def test_vector_message_roundtrip(benchmark, allocations, serializer):
+    def roundtrip():
+        content_type, encoding, data = kombu_serialization.dumps(VECTOR_MESSAGE, serializer=serializer)
+        return kombu_serialization.loads(data, content_type, encoding, accept=ACCEPT)
+
+    benchmark(roundtrip)
+    allocations(roundtrip, rounds=5)
+
+
+@pytest.mark.benchmark(group="celery-batch-result")
+@pytest.mark.parametrize("serializer", CELERY_SERIALIZERS)
+def test_batch_result_roundtrip(benchmark, allocations, serializer):
+    def roundtrip():
+        content_type, encoding, data = kombu_serialization.dumps(BATCH_RESULT, serializer=serializer)
+        return kombu_serialization.loads(data, content_type, encoding, accept=ACCEPT)
+
+    result = benchmark(roundtrip)
+    assert result["finished_at"] == NOW
+    allocations(roundtrip, rounds=5)
+
+
+# Typed values per serializer after a round trip (orjson: UUIDs arrive as strings)
+TYPED = {"finished_at": NOW, "day": NOW.date(), "request_id": uuid.UUID(int=7)}
+EXPECTED = {
+    "json": TYPED,
+    "orjson": {**TYPED, "request_id": str(TYPED["request_id"])},
+    "msgpack": TYPED,
+}
+
+
+@pytest.mark.parametrize("serializer", CELERY_SERIALIZERS)
+def test_typed_values_roundtrip(serializer):
+    content_type, encoding, data = kombu_serialization.dumps(TYPED, serializer=serializer)
+    result = kombu_serialization.loads(data, content_type, encoding, accept=ACCEPT)
+    assert result == EXPECTED[serializer]
+    assert {key: type(value) for key, value in result.items()} == {
+        key: type(value) for key, value in EXPECTED[serializer].items()
+    }
+
+
+@pytest.mark.benchmark(group="api-status-render")
+@pytest.mark.parametrize("response_class", [JSONResponse, FastJSONResponse], ids=["starlette", "codec"])
+def test_status_render(benchmark, allocations, response_class):
+    benchmark(response_class, STATUS_BODY)
+    allocations(lambda: response_class(STATUS_BODY))
@@ -0,0 +1,88 @@
+"""Task state plumbing: result backend updates and the DatabaseTask lifecycle queries."""
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.models.job import Job, JobStatus
+from app.services.progress import ProgressReporter
+from app.worker import _save_partial_result, _start_job, process_vector_data
+
+PROGRESS_META = {"phase": "processing", "done": 4096, "total": 65536, "percent": 6.25, "message": "Processing chunk 1/4..."}
+
+
+@pytest.fixture
+def running_jobs(db_engine):
+    """`running_jobs(n)`: iterator over n new RUNNING job ids (one bulk INSERT)."""
+    def create(count: int):
+        now = datetime.datetime.utcnow()
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        with SessionLocal() as db:
+            db.execute(insert(Job), [
+                {
+                    "id": new_id,
+                    "status": JobStatus.RUNNING.value,
+                    "retry_count": 0,
+                    "input_payload": {"task_type": "vector_processing", "duration": 10},
+                    "created_at": now,
+                    "started_at": now,
+                }
+                for new_id in ids
+            ])
+            db.commit()
+        return iter(ids)
+    return create
+
+
+def test_update_state(benchmark, allocations, job_id):
+    # Result backend write + event bus publish, once per throttled progress update
+    call = lambda: process_vector_data.update_state(task_id=job_id, state="PROGRESS", meta=PROGRESS_META)
+    benchmark(call)
+    allocations(call)
+
+
+def test_progress_advance_throttled(benchmark, allocations, job_id):
+    # Per-item cost when updates are rate limited (most calls publish nothing)
+    progress = ProgressReporter(
+        lambda meta: process_vector_data.update_state(task_id=job_id, state="PROGRESS", meta=meta), job_id,
+    )
+    progress.set_phase("processing", total=10 ** 9)
+    benchmark(progress.advance, 1)
+    allocations(lambda: progress.advance(1))
+
+
+def test_start_job(benchmark, allocations, job_id):
+    # Conditional UPDATE ... RETURNING (RUNNING -> RUNNING, as on a retry) + cache invalidation
+    benchmark(_start_job, process_vector_data, job_id)
+    allocations(lambda: _start_job(process_vector_data, job_id))
+
+
+def test_on_success(benchmark, allocations, running_jobs):
+    # Log flush, SUCCESS transition + run-time rollup upsert, cache invalidation, event
+    result = {"processed_vectors": 65536, "status": "indexed"}
+    jobs = running_jobs(300)
+
+    def hook(job):
+        process_vector_data.on_success(result, job, [job], {})
+
+    benchmark.pedantic(hook, setup=lambda: ((next(jobs),), {}), rounds=200)
+    allocations(lambda: hook(next(jobs)), rounds=50)
+
+
+def test_on_failure(benchmark, allocations, running_jobs):
+    error = ConnectionError("Connection to external service timed out.")
+    jobs = running_jobs(300)
+
+    def hook(job):
+        process_vector_data.on_failure(error, job, [job], {}, None)
+
+    benchmark.pedantic(hook, setup=lambda: ((next(jobs),), {}), rounds=200)
+    allocations(lambda: hook(next(jobs)), rounds=50)
+
+
+def test_save_partial_result(benchmark, allocations, job_id):
+    partial = {"total": 1000, "completed": 250, "results": [{"url": f"http://x/{i}", "ok": True} for i in range(250)]}
+    benchmark(_save_partial_result, job_id, partial)
+    allocations(lambda: _save_partial_result(job_id, partial))
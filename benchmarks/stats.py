@@ -0,0 +1,109 @@
+"""
+Benchmark Statistics and Baselines.
+Latency percentiles and throughput per operation, stored as JSON and compared against a
+saved baseline to flag regressions.
+"""
+import json
+import os
+import platform
+import time
+from typing import Any, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Linear interpolation between closest ranks; `q` in [0, 100]."""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+class Recorder:
+    """Latency samples (seconds), error count and wall-clock span of one operation."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.errors = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.extra: Dict[str, Any] = {}
+
+    def add(self, started: float, ok: bool = True):
+        """Record an operation that began at `started` (time.perf_counter()) and just ended."""
+        now = time.perf_counter()
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = now if self.last is None else max(self.last, now)
+        if ok:
+            self.samples.append(now - started)
+        else:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        span = (self.last - self.first) if self.first is not None else 0.0
+        count = len(samples)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "mean_ms": round(sum(samples) / count * 1000, 3) if count else 0.0,
+            "max_ms": round(samples[-1] * 1000, 3) if count else 0.0,
+            "throughput_per_s": round(count / span, 2) if span > 0 else 0.0,
+            **self.extra,
+        }
+
+
+def environment() -> Dict[str, Any]:
+    """Where a result was measured; baselines are only comparable on similar machines."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def baseline_path(workload: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{workload}.json")
+
+
+def save(result: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of `result` against `baseline`: p95/p99 latency above, or throughput below,
+    the baseline by more than `tolerance` (a fraction), and new errors.
+    """
+    regressions = []
+    for name, current in result["operations"].items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if previous[key] and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {current[key]} > {previous[key]} (+{tolerance:.0%})")
+        if previous["throughput_per_s"] and current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}.throughput_per_s: {current['throughput_per_s']} < {previous['throughput_per_s']} (-{tolerance:.0%})"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}.errors: {current['errors']} > {previous['errors']}")
+    return regressions
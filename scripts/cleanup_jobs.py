@@ -1,39 +1,25 @@
-from app.core.database import SessionLocal
-from app.models.job import Job, JobStatus, JobLog
-from sqlalchemy import delete
+"""
+Retention pass over jobs and job logs (see app/services/retention.py).
+Run periodically, e.g. from cron: python -m scripts.cleanup_jobs [--dry-run]
+"""
+import argparse
+import json
+
+from app.services.retention import run_retention
 
-def cleanup_failed_jobs():
-    db = SessionLocal()
-    try:
-        print("Cleaning up failed jobs...")
-        # Find failed jobs
-        failed_jobs_query = db.query(Job).filter(Job.status == JobStatus.FAILED.value)
-        count = failed_jobs_query.count()
-        
-        if count == 0:
-            print("No failed jobs found.")
-            return
 
-        print(f"Found {count} failed jobs. Deleting...")
-        
-        # We need to delete logs first if cascade isn't set up (though it is in models)
-        # But let's be safe and let SQLAlchemy handle cascade if configured
-        # Or just delete the jobs
-        
-        # Get IDs to show
-        ids = [j.id for j in failed_jobs_query.all()]
-        print(f"IDs to delete: {ids}")
-        
-        # Delete
-        failed_jobs_query.delete(synchronize_session=False)
-        db.commit()
-        print("Cleanup complete.")
-        
+def cleanup_jobs(dry_run: bool = False):
+    print("Running retention" + (" (dry run)..." if dry_run else "..."))
+    try:
+        report = run_retention(dry_run=dry_run)
     except Exception as e:
         print(f"Error: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        return
+    print(json.dumps(report, indent=2))
+    print("Cleanup complete.")
+
 
 if __name__ == "__main__":
-    cleanup_failed_jobs()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    cleanup_jobs(dry_run=parser.parse_args().dry_run)
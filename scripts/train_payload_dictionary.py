@@ -0,0 +1,73 @@
+"""
+Train a zstd dictionary for job payload compression (see app/core/compression.py) from
+the most recent large payloads, and report the ratio with and without it.
+
+    python -m scripts.train_payload_dictionary [--samples 2000] [--size 112640] [--output-dir data]
+
+Writes `<output-dir>/payload-<dict_id>.dict`; point PAYLOAD_ZSTD_DICT_PATH at it on the API
+and the workers. Keep earlier dictionaries in the same directory: rows packed with them
+are decompressed by dictionary id.
+"""
+import argparse
+import os
+
+from sqlalchemy import or_, select
+
+from app.core import compression, serialization
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.job import Job
+
+
+def _recent_payloads(limit: int):
+    with SessionLocal() as db:
+        jobs = db.execute(
+            select(Job)
+            .where(or_(Job.input_payload_packed.is_not(None), Job.result_payload_packed.is_not(None)))
+            .order_by(Job.created_at.desc())
+            .limit(limit)
+        ).scalars()
+        for job in jobs:
+            if job.input_payload_packed is not None:
+                yield job.input_payload
+            if job.result_payload_packed is not None:
+                yield job.result_payload
+
+
+def _ratio(samples, raw_sizes) -> float:
+    packed = sum(len(compression.compress(serialization.dumps_bytes(sample))) for sample in samples)
+    return sum(raw_sizes) / max(1, packed)
+
+
+def train(samples: int, size: int, output_dir: str):
+    payloads = list(_recent_payloads(samples))
+    if len(payloads) < 10:
+        print(f"Only {len(payloads)} packed payloads found; run some jobs first.")
+        return
+    raw_sizes = [len(serialization.dumps_bytes(payload)) for payload in payloads]
+    print(f"Training on {len(payloads)} payloads ({sum(raw_sizes) / 1024 ** 2:.1f} MiB)...")
+    data = compression.train_dictionary(payloads, size)
+
+    os.makedirs(output_dir, exist_ok=True)
+    dict_id = compression.zstandard.ZstdCompressionDict(data).dict_id()
+    path = os.path.join(output_dir, f"payload-{dict_id}.dict")
+    with open(path, "wb") as f:
+        f.write(data)
+
+    ratios = []
+    for dictionary_path in ("", path):
+        settings.PAYLOAD_ZSTD_DICT_PATH = dictionary_path
+        compression._dictionary.cache_clear()
+        ratios.append(_ratio(payloads, raw_sizes))
+    without, with_dictionary = ratios
+    print(f"Compression ratio: {without:.2f}x without, {with_dictionary:.2f}x with the dictionary")
+    print(f"Wrote {path}; set PAYLOAD_ZSTD_DICT_PATH={path} to use it.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000, help="most recent jobs with packed payloads to sample")
+    parser.add_argument("--size", type=int, default=112 * 1024, help="dictionary size in bytes")
+    parser.add_argument("--output-dir", default=os.path.dirname(settings.PAYLOAD_ZSTD_DICT_PATH) or "data")
+    args = parser.parse_args()
+    train(args.samples, args.size, args.output_dir)
@@ -66,8 +66,8 @@ def verify_persistence():
     # 4. List tasks
     print("Listing tasks...")
     response = requests.get(f"{BASE_URL}/tasks")
-    tasks = response.json()
-    print(f"Total tasks in DB: {len(tasks)}")
+    page = response.json()
+    print(f"Tasks on first page: {len(page['items'])} (next_cursor: {page['next_cursor']})")
     
     # 5. Verify Cancellation
     print("\nVerifying Cancellation...")